@@ -6,6 +6,7 @@ Serves /home/ken/wip/fam/auntruth/docs/ at localhost:8000/auntruth/
 This allows testing the modernized genealogy site before deploying to GitHub Pages.
 """
 
+import functools
 import http.server
 import socketserver
 import os
@@ -14,48 +15,63 @@ import signal
 from urllib.parse import unquote
 from pathlib import Path
 
+# Document root, resolved once at import rather than for every connection
+DOCS_PATH = Path('/home/ken/wip/fam/auntruth/docs').resolve()
+DOCS_PATH_STR = str(DOCS_PATH)
+
+@functools.lru_cache(maxsize=4096)
+def _translate_path(path, docs_path_str):
+    """Translate URL path to filesystem path under docs_path_str
+
+    A pure function of its (hashable) arguments, so results are cached -
+    browsers request the same handful of static URLs over and over.
+    """
+    # Remove query parameters
+    path = path.split('?', 1)[0]
+    path = path.split('#', 1)[0]
+    path = unquote(path)
+
+    # A NUL can't appear in a filesystem path - open() would raise on it -
+    # so serve the index, as resolve() failing on it used to
+    if '\x00' in path:
+        return os.path.join(docs_path_str, 'index.html')
+
+    # Handle /auntruth/ prefix
+    if path.startswith('/auntruth/'):
+        # Remove /auntruth/ prefix and serve from docs/
+        path = path[9:]  # Remove '/auntruth'
+    elif path == '/auntruth':
+        # Redirect /auntruth to /auntruth/
+        path = '/'
+    elif path == '/':
+        # Root should show the docs index
+        path = '/'
+
+    # Convert to filesystem path
+    if path.startswith('/'):
+        path = path[1:]
+
+    # Normalize the final path lexically - docs_path is already resolved,
+    # so collapsing '..' is enough and avoids resolve()'s per-request syscalls
+    final_path = os.path.normpath(os.path.join(docs_path_str, path))
+
+    # Security check - ensure we stay within docs directory
+    if final_path != docs_path_str and not final_path.startswith(docs_path_str + os.sep):
+        return os.path.join(docs_path_str, 'index.html')
+
+    return final_path
+
 class GenealogyHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
     """Custom handler to serve docs/ content at /auntruth/ path"""
 
     def __init__(self, *args, **kwargs):
         # Set the document root to the docs directory
-        self.docs_path = Path('/home/ken/wip/fam/auntruth/docs').resolve()
-        super().__init__(*args, directory=str(self.docs_path), **kwargs)
+        self.docs_path = DOCS_PATH
+        super().__init__(*args, directory=DOCS_PATH_STR, **kwargs)
 
     def translate_path(self, path):
         """Translate URL path to filesystem path"""
-        # Remove query parameters
-        path = path.split('?', 1)[0]
-        path = path.split('#', 1)[0]
-        path = unquote(path)
-
-        # Handle /auntruth/ prefix
-        if path.startswith('/auntruth/'):
-            # Remove /auntruth/ prefix and serve from docs/
-            path = path[9:]  # Remove '/auntruth'
-        elif path == '/auntruth':
-            # Redirect /auntruth to /auntruth/
-            path = '/'
-        elif path == '/':
-            # Root should show the docs index
-            path = '/'
-
-        # Convert to filesystem path
-        if path.startswith('/'):
-            path = path[1:]
-
-        # Resolve the final path
-        final_path = self.docs_path / path
-
-        # Security check - ensure we stay within docs directory
-        try:
-            final_path = final_path.resolve()
-            if not str(final_path).startswith(str(self.docs_path)):
-                return str(self.docs_path / 'index.html')
-        except:
-            return str(self.docs_path / 'index.html')
-
-        return str(final_path)
+        return _translate_path(path, DOCS_PATH_STR)
 
     def end_headers(self):
         """Add CORS headers for local development"""
@@ -72,7 +88,7 @@ def start_server(port=8000):
     """Start the genealogy development server"""
 
     # Check if docs directory exists
-    docs_path = Path('/home/ken/wip/fam/auntruth/docs')
+    docs_path = DOCS_PATH
     if not docs_path.exists():
         print(f"Error: docs directory not found at {docs_path}")
         sys.exit(1)
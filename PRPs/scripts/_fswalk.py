@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Shared directory walking for the scripts in PRPs/scripts/{htm,new,both}.
+
+The scripts run standalone, so each one adds PRPs/scripts to sys.path
+before importing from here.
+"""
+
+import os
+
+# Directories that never contain site content; pruned from every walk
+EXCLUDED_DIRS = {'.git', 'node_modules', '.venv', '__pycache__'}
+
+HTML_SUFFIXES = ('.htm', '.html')
+
+
+def iter_html_files(root, ignore_case=False, suffixes=HTML_SUFFIXES):
+    """Yield paths of .htm/.html files under root, in os.walk order
+
+    Uses os.scandir so the suffix test and directory check come from the
+    directory entry itself, with no stat() per file. With ignore_case,
+    upper- and mixed-case suffixes such as .HTM match too. Pass suffixes
+    (lowercase) to match other file endings instead.
+    """
+    subdirs = []
+    try:
+        with os.scandir(root) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in EXCLUDED_DIRS:
+                        subdirs.append(entry.path)
+                else:
+                    name = entry.name.lower() if ignore_case else entry.name
+                    if name.endswith(suffixes):
+                        yield entry.path
+    except OSError:
+        # Unreadable directory - skip it, as os.walk does
+        return
+    for subdir in subdirs:
+        yield from iter_html_files(subdir, ignore_case, suffixes)
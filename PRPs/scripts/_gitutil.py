@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Shared git helpers for the scripts in PRPs/scripts/{htm,new,both}.
+
+The scripts run standalone, so each one adds PRPs/scripts to sys.path
+before importing from here.
+"""
+
+from pathlib import Path
+
+
+def get_current_branch(start_dir='.'):
+    """Return the checked-out branch by reading .git/HEAD directly
+
+    Much cheaper than forking 'git branch --show-current'. A detached HEAD
+    is reported as the abbreviated commit hash.
+    """
+    start = Path(start_dir).resolve()
+    for directory in (start, *start.parents):
+        git_dir = directory / '.git'
+        if git_dir.is_file():
+            # Worktrees and submodules use a .git file pointing at the real git dir
+            git_dir = directory / git_dir.read_text().split(':', 1)[1].strip()
+        if git_dir.is_dir():
+            head = (git_dir / 'HEAD').read_text().strip()
+            if head.startswith('ref: refs/heads/'):
+                return head[len('ref: refs/heads/'):]
+            return head[:7]
+    raise ValueError(f"{start} is not inside a git repository")
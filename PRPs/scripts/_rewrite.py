@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Shared in-place file rewriting for the scripts in PRPs/scripts/{htm,new,both}.
+
+The scripts run standalone, so each one adds PRPs/scripts to sys.path
+before importing from here.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+
+def rewrite_file(file_path, replacements):
+    """Apply (old, new) byte replacements to a file, returning True if it was rewritten
+
+    The replacements run in order over one read of the file, and the file
+    is written at most once. Works on raw bytes, so there is nothing to
+    decode and no bytes are lost to a text-mode read.
+    """
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    new_data = data
+    for old, new in replacements:
+        new_data = new_data.replace(old, new)
+    if new_data != data:
+        with open(file_path, 'wb') as f:
+            f.write(new_data)
+        return True
+    return False
+
+
+def rewrite_files(file_paths, replacements):
+    """Rewrite file_paths concurrently, yielding (file_path, changed) in order
+
+    The files are independent and the work is I/O, so threads overlap the
+    reads and writes.
+    """
+    with ThreadPoolExecutor() as executor:
+        yield from zip(file_paths, executor.map(partial(rewrite_file, replacements=replacements), file_paths))
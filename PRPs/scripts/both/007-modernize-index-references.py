@@ -15,6 +15,7 @@ CRITICAL SAFETY REQUIREMENTS:
 - Error logging and recovery
 """
 
+import mmap
 import os
 import re
 import subprocess
@@ -22,6 +23,12 @@ import sys
 from datetime import datetime
 from pathlib import Path
 import argparse
+import functools
+from concurrent.futures import ProcessPoolExecutor
+
+# Shared helpers live one level up, in PRPs/scripts
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from _fswalk import iter_html_files
 
 
 def verify_git_branch(expected_branch):
@@ -38,68 +45,149 @@ def verify_git_branch(expected_branch):
         raise ValueError(f"Failed to get current git branch: {e}")
 
 
-def count_affected_files(target_dir, pattern):
-    """Count files that would be affected by this operation"""
-    affected_files = []
+# 128 KB buffers for reading and writing HTML files
+IO_BUFFER_SIZE = 128 * 1024
+
+# Compiled once at import rather than on every file: the reference itself
+# and the href attribute it is rewritten in, as bytes patterns run straight
+# over mapped files, and the <a> element shown as a dry-run sample
+INDEX_REF_RE = re.compile(rb'\\AuntRuth\\index\.htm', re.IGNORECASE)
+INDEX_HREF_RE = re.compile(rb'(href\s*=\s*["\'])\\AuntRuth\\index\.htm(["\'])', re.IGNORECASE)
+INDEX_LINK_SAMPLE_RE = re.compile(rb'<a[^>]*href\s*=\s*["\']\\AuntRuth\\index\.htm["\'][^>]*>.*?</a>',
+                                  re.IGNORECASE | re.DOTALL)
+
+def count_affected_files(target_dir, pattern, sample_size=10):
+    """Count files that would be affected by this operation
+
+    Streams the walk, keeping only the first sample_size affected files and
+    a sample <a> element from each rather than a list of every match.
+    Returns (affected_count, total_occurrences, samples) where samples holds
+    (file_path, sample) pairs; sample is None when no <a> element matched.
+    """
+    affected_count = 0
     total_occurrences = 0
+    samples = []
 
     print(f"🔍 Scanning {target_dir} for pattern: {pattern}")
 
-    for root, dirs, files in os.walk(target_dir):
-        for file in files:
-            if file.endswith(('.htm', '.html')):
-                file_path = os.path.join(root, file)
-                try:
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-                        # Look for the specific pattern we need to fix
-                        matches = re.findall(r'\\AuntRuth\\index\.htm', content, re.IGNORECASE)
-                        if matches:
-                            affected_files.append(file_path)
-                            total_occurrences += len(matches)
-                except (OSError, IOError) as e:
-                    print(f"⚠️  Error reading {file_path}: {e}")
+    for file_path in iter_html_files(target_dir):
+        try:
+            # Count straight off a read-only mapping of the file: no copy
+            # into a Python object and no decode, just the regex over the
+            # page cache. Empty files can't be mapped and have nothing to count.
+            with open(file_path, 'rb', buffering=IO_BUFFER_SIZE) as f:
+                if os.fstat(f.fileno()).st_size == 0:
                     continue
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    occurrences = len(INDEX_REF_RE.findall(mm))
+                    if occurrences and len(samples) < sample_size:
+                        # Take the sample while the file is still mapped
+                        match = INDEX_LINK_SAMPLE_RE.search(mm)
+                        samples.append((file_path, decode_sample(match.group()) if match else None))
+            if occurrences:
+                affected_count += 1
+                total_occurrences += occurrences
+        except (OSError, IOError) as e:
+            print(f"⚠️  Error reading {file_path}: {e}")
+            continue
+
+    return affected_count, total_occurrences, samples
 
-    return affected_files, total_occurrences
+
+def decode_sample(raw):
+    """Decode sample markup as a text-mode read of the file would have"""
+    sample = raw.decode('utf-8', errors='ignore')
+    return sample.replace('\r\n', '\n').replace('\r', '\n')
 
 
 def calculate_relative_path(from_file, target_dir):
     """Calculate the relative path from a file to the target directory"""
-    from_dir = os.path.dirname(from_file)
+    # The answer depends only on the file's directory, so sibling files
+    # share one cached computation
+    return _relative_dir_path(os.path.dirname(from_file), target_dir)
+
 
+@functools.lru_cache(maxsize=None)
+def _relative_dir_path(from_dir, target_dir):
+    """Relative web path from from_dir to target_dir, cached per process"""
     # Count how many levels deep we are from the target directory
     rel_path = os.path.relpath(target_dir, from_dir)
 
     # Normalize path separators to forward slashes for web compatibility
-    rel_path = rel_path.replace('\\', '/')
+    return rel_path.replace('\\', '/')
+
+
+def rewrite_file(file_path, target_index_dir):
+    """Fix \\AuntRuth\\index.htm references in a single file
 
-    return rel_path
+    Returns (file_path, occurrences, new_ref, changed, error) so it can run
+    in a worker process; occurrences is 0 for files without the reference.
+    """
+    try:
+        # Scan and rewrite straight off a read-only mapping of the file, so
+        # the only full-size buffer is the rewritten content; nothing is
+        # copied or decoded for files without the reference
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return file_path, 0, None, False, None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # Look for the specific pattern we need to fix
+                occurrences = len(INDEX_REF_RE.findall(mm))
+                if not occurrences:
+                    return file_path, 0, None, False, None
+
+                # Calculate the correct relative path for this specific file
+                rel_path = calculate_relative_path(file_path, target_index_dir)
+                new_ref = f"{rel_path}/index.html"
+                new_ref_bytes = new_ref.encode('utf-8')
+
+                # Replace the pattern, counting replacements as we go
+                new_content, replaced = INDEX_HREF_RE.subn(
+                    lambda m: m.group(1) + new_ref_bytes + m.group(2),
+                    mm
+                )
+
+        # Only write if something was actually replaced
+        if replaced:
+            with open(file_path, 'wb', buffering=IO_BUFFER_SIZE) as f:
+                f.write(new_content)
+
+        return file_path, occurrences, new_ref, bool(replaced), None
+
+    except Exception as e:
+        return file_path, 0, None, False, str(e)
+
+
+def _rewrite_file_worker(job):
+    """ProcessPoolExecutor entry point taking a (file_path, target_index_dir) job"""
+    return rewrite_file(*job)
 
 
 def process_files_batch(target_dir, dry_run=True, max_files=None):
     """Process files with safety measures and proper relative path calculation"""
 
-    # Find all files that need fixing
-    print("📊 Analyzing scope of changes needed...")
-    affected_files, total_occurrences = count_affected_files(target_dir, r'\\AuntRuth\\index\.htm')
+    if dry_run:
+        # Find all files that need fixing
+        print("📊 Analyzing scope of changes needed...")
+        sample_size = min(10, max_files) if max_files else 10
+        affected_count, total_occurrences, samples = count_affected_files(
+            target_dir, r'\\AuntRuth\\index\.htm', sample_size)
 
-    print(f"📈 Found {len(affected_files)} files with {total_occurrences} total occurrences")
+        print(f"📈 Found {affected_count} files with {total_occurrences} total occurrences")
 
-    if max_files:
-        affected_files = affected_files[:max_files]
-        print(f"🎯 Limited to first {len(affected_files)} files for testing")
+        if max_files:
+            affected_count = min(affected_count, max_files)
+            print(f"🎯 Limited to first {affected_count} files for testing")
 
-    if dry_run:
         print("\n🧪 DRY RUN MODE - Showing what would be changed:")
         print("="*60)
 
-        sample_count = min(10, len(affected_files))
-        for i, file_path in enumerate(affected_files[:sample_count]):
+        sample_count = len(samples)
+        target_index_dir = os.path.join(target_dir, 'htm')
+        for i, (file_path, sample) in enumerate(samples):
             print(f"{i+1:2d}. {file_path}")
 
             # Calculate what the relative path should be
-            target_index_dir = os.path.join(target_dir, 'htm')
             rel_path = calculate_relative_path(file_path, target_index_dir)
             new_ref = f"{rel_path}/index.html"
 
@@ -107,57 +195,56 @@ def process_files_batch(target_dir, dry_run=True, max_files=None):
             print(f"    New:     {new_ref}")
 
             # Show actual content sample
-            try:
-                with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                    content = f.read()
-                    match = re.search(r'<a[^>]*href\s*=\s*["\']\\AuntRuth\\index\.htm["\'][^>]*>.*?</a>',
-                                    content, re.IGNORECASE | re.DOTALL)
-                    if match:
-                        print(f"    Sample:  {match.group()[:80]}...")
-            except Exception as e:
-                print(f"    Error reading sample: {e}")
+            if sample is not None:
+                print(f"    Sample:  {sample[:80]}...")
             print()
 
-        if len(affected_files) > sample_count:
-            print(f"... and {len(affected_files) - sample_count} more files")
+        if affected_count > sample_count:
+            print(f"... and {affected_count - sample_count} more files")
 
         print("="*60)
         print("✅ Dry run complete. Use --execute to perform actual changes.")
-        return affected_files
+        return [file_path for file_path, _ in samples]
 
-    # Actual processing
-    print(f"\n🚀 Starting to process {len(affected_files)} files...")
+    # Actual processing - a single walk that reads, tests, rewrites and
+    # writes each file once; there is no separate scan pass beforehand
+    print(f"\n🚀 Scanning and processing files in {target_dir}...")
     processed = 0
+    total_occurrences = 0
     errors = []
     changes_made = []
 
     # Create incremental commit checkpoints for large operations
     checkpoint_interval = 500  # Commit every 500 files
+    checkpointed = 0  # Number of changes_made entries already staged
 
-    for i, file_path in enumerate(affected_files):
-        try:
-            # Read file content
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                original_content = f.read()
-
-            # Calculate the correct relative path for this specific file
-            target_index_dir = os.path.join(target_dir, 'htm')
-            rel_path = calculate_relative_path(file_path, target_index_dir)
-            new_ref = f"{rel_path}/index.html"
+    target_index_dir = os.path.join(target_dir, 'htm')
 
-            # Replace the pattern
-            new_content = re.sub(
-                r'(href\s*=\s*["\'])\\AuntRuth\\index\.htm(["\'])',
-                rf'\g<1>{new_ref}\g<2>',
-                original_content,
-                flags=re.IGNORECASE
-            )
+    file_paths = list(iter_html_files(target_dir))
+    jobs = [(file_path, target_index_dir) for file_path in file_paths]
 
-            # Only write if content actually changed
-            if new_content != original_content:
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(new_content)
+    if max_files:
+        # Test mode stops after a handful of files, so run serially
+        results = map(_rewrite_file_worker, jobs)
+        executor = None
+    else:
+        # Files are independent, so spread the rewrites across all CPUs
+        executor = ProcessPoolExecutor(max_workers=os.cpu_count())
+        results = executor.map(_rewrite_file_worker, jobs, chunksize=64)
 
+    try:
+        for file_path, occurrences, new_ref, changed, error in results:
+            if error:
+                error_msg = f"Error processing {file_path}: {error}"
+                errors.append(error_msg)
+                print(f"❌ {error_msg}")
+                continue
+
+            if not occurrences:
+                continue
+            total_occurrences += occurrences
+
+            if changed:
                 changes_made.append({
                     'file': file_path,
                     'old_ref': '\\AuntRuth\\index.htm',
@@ -168,29 +255,34 @@ def process_files_batch(target_dir, dry_run=True, max_files=None):
 
             # Progress reporting
             if processed % 100 == 0:
-                print(f"⏳ Processed {processed}/{len(affected_files)} files... "
-                      f"({processed/len(affected_files)*100:.1f}%)")
+                print(f"⏳ Processed {processed} files, {len(changes_made)} changed...")
 
-            # Create checkpoint commits for large operations
-            if processed % checkpoint_interval == 0:
+            # Create checkpoint commits for large operations; these run here
+            # in the parent, never inside a worker. Only the files rewritten
+            # since the last checkpoint are staged - 'git add .' would rescan
+            # the whole tree every time - and with none there is nothing to commit
+            if processed % checkpoint_interval == 0 and len(changes_made) > checkpointed:
                 print(f"💾 Creating checkpoint commit at {processed} files...")
+                pending = [change['file'] for change in changes_made[checkpointed:]]
+                checkpointed = len(changes_made)
                 try:
-                    subprocess.run(['git', 'add', '.'], check=True, cwd=target_dir)
+                    subprocess.run(['git', 'add', '--'] + pending, check=True)
                     commit_msg = f"Task 007 checkpoint: Fixed index.htm references in {processed} files"
                     subprocess.run(['git', 'commit', '-m', commit_msg], check=True, cwd=target_dir)
                     print(f"✅ Checkpoint commit created")
                 except subprocess.CalledProcessError as e:
                     print(f"⚠️  Warning: Could not create checkpoint commit: {e}")
 
-        except Exception as e:
-            error_msg = f"Error processing {file_path}: {e}"
-            errors.append(error_msg)
-            print(f"❌ {error_msg}")
-            continue
+            if max_files and processed >= max_files:
+                break
+    finally:
+        if executor is not None:
+            executor.shutdown()
 
     print(f"\n🎉 Processing completed!")
     print(f"📊 Statistics:")
     print(f"   - Total files processed: {processed}")
+    print(f"   - Total occurrences found: {total_occurrences}")
     print(f"   - Files with changes: {len(changes_made)}")
     print(f"   - Errors encountered: {len(errors)}")
 
@@ -204,29 +296,27 @@ def process_files_batch(target_dir, dry_run=True, max_files=None):
     return changes_made
 
 
-def validate_changes(target_dir, sample_size=10):
+def validate_changes(changes_made, sample_size=10):
     """Validate that changes were applied correctly"""
     print(f"\n🔍 Validating changes (checking {sample_size} random files)...")
 
-    # Find files that should have been changed
-    all_files = []
-    for root, dirs, files in os.walk(target_dir):
-        for file in files:
-            if file.endswith(('.htm', '.html')):
-                all_files.append(os.path.join(root, file))
+    # The files that should have been changed are already known from the
+    # processing run, so there is no need to walk the tree again
+    changed_files = [change['file'] for change in changes_made]
 
     # Sample random files for validation
     import random
-    sample_files = random.sample(all_files, min(sample_size, len(all_files)))
+    sample_files = random.sample(changed_files, min(sample_size, len(changed_files)))
 
     validation_results = []
     for file_path in sample_files:
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            with open(file_path, 'rb', buffering=IO_BUFFER_SIZE) as f:
                 content = f.read()
 
-            # Check if old pattern still exists
-            old_pattern_found = re.search(r'\\AuntRuth\\index\.htm', content, re.IGNORECASE)
+            # Check if old pattern still exists - the reference is ASCII, so
+            # search the raw bytes without decoding
+            old_pattern_found = INDEX_REF_RE.search(content)
 
             validation_results.append({
                 'file': file_path,
@@ -295,9 +385,13 @@ def main():
 
             changes = process_files_batch(args.target_dir, dry_run=False, max_files=max_files)
 
-            # Final commit
+            # Final commit - stage just the rewritten files by feeding their
+            # paths to update-index, rather than 'git add .' rescanning the
+            # whole working tree
             print(f"\n💾 Creating final commit...")
-            subprocess.run(['git', 'add', '.'], check=True)
+            changed_paths = ''.join(f"{change['file']}\0" for change in changes)
+            subprocess.run(['git', 'update-index', '--add', '-z', '--stdin'],
+                           input=changed_paths, text=True, check=True)
             commit_msg = f"""Task 007: Modernize index.htm references
 
 - Fixed {len(changes)} files with broken \\AuntRuth\\index.htm references
@@ -313,7 +407,7 @@ Co-Authored-By: Claude <noreply@anthropic.com>"""
             print(f"✅ Final commit created")
 
             if args.validate:
-                validate_changes(args.target_dir)
+                validate_changes(changes)
 
         else:
             # Default to dry run
@@ -19,8 +19,16 @@ import re
 import sys
 import subprocess
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
+# Shared helpers live one level up, in PRPs/scripts
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from _fswalk import iter_html_files
+
+# 128 KB buffers for reading and writing HTML files
+IO_BUFFER_SIZE = 128 * 1024
+
 def verify_git_branch(expected_branch):
     """Verify we're working in the correct branch"""
     try:
@@ -33,6 +41,37 @@ def verify_git_branch(expected_branch):
     except subprocess.CalledProcessError as e:
         raise ValueError(f"Failed to check git branch: {e}")
 
+# Map of Windows-1252 characters that commonly appear as � when misinterpreted.
+# En and em dashes (U+2013, U+2014) are already correct and are left alone.
+WINDOWS1252_TABLE = str.maketrans({
+    # Smart quotes
+    '\u2018': "'",      # Left single quotation mark → apostrophe
+    '\u2019': "'",      # Right single quotation mark → apostrophe
+    '\u201C': '"',      # Left double quotation mark → quote
+    '\u201D': '"',      # Right double quotation mark → quote
+
+    # Common Windows-1252 characters that show as � when misencoded
+    '\uFFFD': '"',      # This is likely a misencoded right double quote (0x94)
+})
+
+# Multi-character fix-ups, as one alternation so the content is scanned
+# once for all of them; each named group maps to its replacement
+PATTERN_FIXES_RE = re.compile(
+    r'(?P<china>China�\s+The\s+Hartwells�)'
+    r'|(?P<copyright>^�\s*Copyright)'
+    r'|(?P<strong_copyright><strong>�\s*Copyright)',
+    re.MULTILINE
+)
+PATTERN_FIXES = {
+    'china': 'China" The Hartwells"',           # "China� The Hartwells�"
+    'copyright': '© Copyright',                  # "� Copyright" at line start
+    'strong_copyright': '<strong>© Copyright',   # "<strong>� Copyright"
+}
+
+# Charset declaration, as text and as bytes for files handled without decoding
+CHARSET_DECLARATION_RE = re.compile(r'(charset=)windows-1252', re.IGNORECASE)
+CHARSET_DECLARATION_BYTES_RE = re.compile(rb'(charset=)windows-1252', re.IGNORECASE)
+
 def convert_windows1252_to_unicode(content):
     """
     Convert Windows-1252 encoded characters to proper Unicode.
@@ -42,112 +81,164 @@ def convert_windows1252_to_unicode(content):
     resulting in the � replacement character.
     """
 
-    # Map of Windows-1252 characters that commonly appear as � when misinterpreted
-    # These are the byte values in Windows-1252 that need special handling
-    conversions = {
-        # Smart quotes and dashes
-        '\u2018': "'",      # Left single quotation mark → apostrophe
-        '\u2019': "'",      # Right single quotation mark → apostrophe
-        '\u201C': '"',      # Left double quotation mark → quote
-        '\u201D': '"',      # Right double quotation mark → quote
-        '\u2013': '–',      # En dash
-        '\u2014': '—',      # Em dash
-
-        # Common Windows-1252 characters that show as � when misencoded
-        '�': '"',           # This is likely a misencoded right double quote (0x94)
-    }
-
-    # Apply conversions
-    for old_char, new_char in conversions.items():
-        content = content.replace(old_char, new_char)
-
-    # Handle specific problematic patterns we identified
-    # Fix "China� The Hartwells�" → "China" The Hartwells""
-    content = re.sub(r'China�\s+The\s+Hartwells�', 'China" The Hartwells"', content)
-
-    # Fix "� Copyright" → "© Copyright"
-    content = re.sub(r'^�\s*Copyright', '© Copyright', content, flags=re.MULTILINE)
-    content = re.sub(r'<strong>�\s*Copyright', '<strong>© Copyright', content)
+    # Apply all single-character conversions in one pass
+    content = content.translate(WINDOWS1252_TABLE)
+
+    # Handle specific problematic patterns we identified, all in one pass
+    content = PATTERN_FIXES_RE.sub(lambda m: PATTERN_FIXES[m.lastgroup], content)
 
     return content
 
 def update_charset_declaration(content):
     """Update charset declaration from windows-1252 to utf-8"""
 
-    # Pattern to match charset declarations
-    charset_pattern = r'(charset=)windows-1252'
-    replacement = r'\1utf-8'
-
-    updated_content = re.sub(charset_pattern, replacement, content, flags=re.IGNORECASE)
+    updated_content = CHARSET_DECLARATION_RE.sub(r'\1utf-8', content)
 
     return updated_content
 
-def process_file(file_path, dry_run=True):
-    """Process a single HTML file for encoding conversion"""
+def convert_file(file_path, dry_run=True, raw=None):
+    """Convert a single HTML file, returning (file_path, changes_made, error)
+
+    Does no printing so it can run in a worker process; changes_made lists
+    the kinds of change applied (or that would be applied in a dry run).
+    raw is the file's content when the caller has already read it.
+    """
 
     try:
-        # Read file with error handling for encoding issues
-        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
-            original_content = f.read()
+        if raw is None:
+            with open(file_path, 'rb', buffering=IO_BUFFER_SIZE) as f:
+                raw = f.read()
 
         # Track what changes we're making
         changes_made = []
-        new_content = original_content
 
-        # 1. Convert Windows-1252 characters to Unicode
-        converted_content = convert_windows1252_to_unicode(new_content)
-        if converted_content != new_content:
-            changes_made.append("character_conversion")
-            new_content = converted_content
+        if raw.isascii():
+            # Pure ASCII has no characters to convert, so only the charset
+            # declaration can change - handle it on the bytes, no decoding
+            new_raw, count = CHARSET_DECLARATION_BYTES_RE.subn(rb'\1utf-8', raw)
+            if count:
+                changes_made.append("charset_declaration")
+        else:
+            # Decode with error handling for encoding issues; invalid bytes
+            # become U+FFFD, which the conversion table then handles
+            original_content = raw.decode('utf-8', errors='replace')
+            new_content = original_content
+
+            # 1. Convert Windows-1252 characters to Unicode
+            converted_content = convert_windows1252_to_unicode(new_content)
+            if converted_content != new_content:
+                changes_made.append("character_conversion")
+                new_content = converted_content
 
-        # 2. Update charset declaration
-        charset_updated = update_charset_declaration(new_content)
-        if charset_updated != new_content:
-            changes_made.append("charset_declaration")
-            new_content = charset_updated
+            # 2. Update charset declaration
+            charset_updated = update_charset_declaration(new_content)
+            if charset_updated != new_content:
+                changes_made.append("charset_declaration")
+                new_content = charset_updated
 
-        # Report changes for this file
-        if changes_made:
-            change_summary = ", ".join(changes_made)
-            print(f"  {file_path}: {change_summary}")
+            new_raw = new_content.encode('utf-8')
 
-            if not dry_run:
-                # Write the updated content
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(new_content)
-                return True
+        if changes_made and not dry_run:
+            # Write the updated content
+            with open(file_path, 'wb', buffering=IO_BUFFER_SIZE) as f:
+                f.write(new_raw)
 
-        return len(changes_made) > 0
+        return file_path, changes_made, None
 
     except Exception as e:
-        print(f"ERROR processing {file_path}: {e}")
+        return file_path, [], str(e)
+
+def report_result(file_path, changes_made, error):
+    """Print the outcome for one file; returns True if it was (or would be) changed"""
+    if error:
+        print(f"ERROR processing {file_path}: {error}")
         return False
 
-def find_target_files(target_dir):
-    """Find all HTML files that need processing"""
+    # Report changes for this file
+    if changes_made:
+        change_summary = ", ".join(changes_made)
+        print(f"  {file_path}: {change_summary}")
+        return True
 
-    target_files = []
+    return False
 
-    # Walk through all subdirectories
-    for root, dirs, files in os.walk(target_dir):
-        for file in files:
-            if file.endswith(('.htm', '.html')):
-                file_path = os.path.join(root, file)
+def process_file(file_path, dry_run=True):
+    """Process a single HTML file for encoding conversion"""
+    return report_result(*convert_file(file_path, dry_run))
+
+def needs_character_conversion(raw):
+    """Check raw (non-ASCII) file bytes for characters the conversion touches
+
+    Equivalent to decoding with errors='replace' and looking for U+FFFD,
+    U+201D or U+00A9, without decoding files that are valid UTF-8 and
+    contain none of them.
+    """
+    if b'\xef\xbf\xbd' in raw or b'\xe2\x80\x9d' in raw or b'\xc2\xa9' in raw:
+        return True
+    # Any invalid UTF-8 would have been decoded as U+FFFD
+    try:
+        raw.decode('utf-8')
+    except UnicodeDecodeError:
+        return True
+    return False
+
+def needs_processing(raw):
+    """Check whether a file's raw bytes need any conversion"""
+    # Check for problem characters or a windows-1252 charset. The digits
+    # can't differ in case, so a plain search for them rules out most
+    # files before paying for a lowercased copy.
+    if not raw.isascii() and needs_character_conversion(raw):
+        return True
+    return b'1252' in raw and b'charset=windows-1252' in raw.lower()
+
+def check_file(file_path, convert=False, dry_run=True):
+    """Check one HTML file and, with convert, convert it from the same read
+
+    Returns (file_path, needs_processing, changes_made, read_error,
+    convert_error). The file's content stays in the worker process, and
+    each file is opened once for both the check and the conversion.
+    """
+    try:
+        # Check if file needs processing on the raw bytes - no decode
+        with open(file_path, 'rb', buffering=IO_BUFFER_SIZE) as f:
+            raw = f.read()
+    except Exception as e:
+        return file_path, False, [], str(e), None
+
+    if not needs_processing(raw):
+        return file_path, False, [], None, None
+    if not convert:
+        return file_path, True, [], None, None
+
+    _, changes_made, error = convert_file(file_path, dry_run, raw)
+    return file_path, True, changes_made, None, error
 
-                try:
-                    # Check if file needs processing
-                    with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
-                        content = f.read()
+def _check_file_worker(job):
+    """ProcessPoolExecutor entry point taking a (file_path, convert, dry_run) job"""
+    return check_file(*job)
 
-                    # Check for windows-1252 charset or problem characters
-                    needs_charset_update = 'charset=windows-1252' in content.lower()
-                    needs_char_conversion = '�' in content or '\u201d' in content or '\u00a9' in content
+def find_target_files(target_dir, convert=False, dry_run=True):
+    """Find all HTML files that need processing
 
-                    if needs_charset_update or needs_char_conversion:
-                        target_files.append(file_path)
+    Returns sorted (file_path, changes_made, error) results, one per file
+    that needs processing. With convert, each file is also converted (or,
+    with dry_run, the changes are worked out) by the worker that checked
+    it, so every file is read once and no content crosses the process
+    boundary. The work is spread across all CPUs as the walk produces
+    paths; the character-table conversions make it CPU-bound.
+    """
 
-                except Exception as e:
-                    print(f"Warning: Could not check {file_path}: {e}")
+    target_files = []
+
+    # Walk through all subdirectories
+    jobs = ((file_path, convert, dry_run) for file_path in iter_html_files(target_dir))
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        results = executor.map(_check_file_worker, jobs, chunksize=64)
+        for file_path, needs, changes_made, read_error, error in results:
+            if read_error:
+                print(f"Warning: Could not check {file_path}: {read_error}")
+            elif needs:
+                target_files.append((file_path, changes_made, error))
 
     return sorted(target_files)
 
@@ -173,34 +264,37 @@ def main():
         print(f"ERROR: {e}")
         return 1
 
-    # Find target files
+    # Get execution mode
+    if len(sys.argv) > 1:
+        mode = sys.argv[1].lower()
+    else:
+        mode = "dry-run"
+
+    # Find target files, converting them in the same pass when the mode
+    # reports or applies changes; execute writes them during the scan
     print("\n--- SCOPE ANALYSIS ---")
-    target_files = find_target_files(target_dir)
+    target_files = find_target_files(target_dir,
+                                     convert=mode in ("dry-run", "execute"),
+                                     dry_run=mode != "execute")
 
     if not target_files:
         print("No files found that need encoding conversion.")
         return 0
 
     print(f"Found {len(target_files)} files that need processing:")
-    for i, file_path in enumerate(target_files[:10], 1):
+    for i, (file_path, _, _) in enumerate(target_files[:10], 1):
         print(f"  {i}. {file_path}")
 
     if len(target_files) > 10:
         print(f"  ... and {len(target_files) - 10} more files")
 
-    # Get execution mode
-    if len(sys.argv) > 1:
-        mode = sys.argv[1].lower()
-    else:
-        mode = "dry-run"
-
     if mode == "dry-run":
         print(f"\n--- DRY RUN MODE ---")
         print("Showing what changes would be made (no files will be modified):")
 
         changes_count = 0
-        for file_path in target_files:
-            if process_file(file_path, dry_run=True):
+        for result in target_files:
+            if report_result(*result):
                 changes_count += 1
 
         print(f"\nDry run complete: {changes_count} files would be modified")
@@ -213,18 +307,15 @@ def main():
         processed = 0
         errors = 0
 
-        for i, file_path in enumerate(target_files, 1):
-            try:
-                if process_file(file_path, dry_run=False):
-                    processed += 1
-
-                # Progress reporting
-                if i % 50 == 0 or i == len(target_files):
-                    print(f"Processed {i}/{len(target_files)} files...")
-
-            except Exception as e:
-                print(f"ERROR processing {file_path}: {e}")
+        for i, (file_path, changes_made, error) in enumerate(target_files, 1):
+            if error:
                 errors += 1
+            if report_result(file_path, changes_made, error):
+                processed += 1
+
+            # Progress reporting
+            if i % 50 == 0 or i == len(target_files):
+                print(f"Processed {i}/{len(target_files)} files...")
 
         print(f"\nExecution complete:")
         print(f"  Files processed: {processed}")
@@ -248,7 +339,7 @@ def main():
             print("✓ Validation successful: No files need further conversion")
         else:
             print(f"⚠ {len(remaining_files)} files still need conversion:")
-            for file_path in remaining_files[:5]:
+            for file_path, _, _ in remaining_files[:5]:
                 print(f"  {file_path}")
             if len(remaining_files) > 5:
                 print(f"  ... and {len(remaining_files) - 5} more")
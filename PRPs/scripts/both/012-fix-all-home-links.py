@@ -3,6 +3,18 @@
 import os
 import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
+
+# 128 KB buffers for reading and writing HTML files
+IO_BUFFER_SIZE = 128 * 1024
+
+# Files between progress lines; progress goes to stderr so it stays out of piped logs
+PROGRESS_INTERVAL = 5000
+
+# Compiled once at import rather than on every file. A single alternation
+# covers both the full "Home |" navigation link and any other /auntruth/
+# home href, so each file is scanned once.
+HOME_LINK_RE = re.compile(rb'<a href=[\'"]/auntruth/[\'"]>Home \|</a>|href=[\'"]/auntruth/[\'"]')
 
 def get_relative_path_to_home(level):
     """Calculate relative path from Lx directory to home"""
@@ -11,37 +23,48 @@ def get_relative_path_to_home(level):
     else:
         return "../" * (level + 1)
 
-def fix_home_links_in_file(file_path, relative_path):
-    """Fix home links in a single file"""
+def build_replacements(relative_path):
+    """Build the (home link, href) replacement strings for a relative home path"""
+    return (
+        f'<a href=\'{relative_path}\'>Home |</a>'.encode('ascii'),
+        f'href=\'{relative_path}\''.encode('ascii')
+    )
+
+def fix_home_links_in_file(file_path, replacements):
+    """Fix home links in a single file
+
+    Returns (file_path, changed, error) so it can run in a worker process.
+    """
+    home_repl, href_repl = replacements
+
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+        # Work on raw bytes - every token involved is ASCII, so skip decoding
+        with open(file_path, 'rb', buffering=IO_BUFFER_SIZE) as f:
             content = f.read()
 
-        original_content = content
+        # Most files have no /auntruth/ references at all - skip the regex passes
+        if b'/auntruth/' not in content:
+            return file_path, False, None
 
-        # Fix the main navigation links
+        # Fix the main navigation links and any other /auntruth/ home references
         # <a href='/auntruth/'>Home |</a> -> <a href='../'>Home |</a> (for L0) or <a href='../../'>Home |</a> (for L1), etc.
-        content = re.sub(
-            r'<a href=[\'"]/auntruth/[\'"]>Home \|</a>',
-            f'<a href=\'{relative_path}\'>Home |</a>',
-            content
-        )
-
-        # Also fix any other /auntruth/ home references
-        content = re.sub(
-            r'href=[\'"]/auntruth/[\'"]',
-            f'href=\'{relative_path}\'',
-            content
-        )
-
-        if content != original_content:
-            with open(file_path, 'w', encoding='utf-8') as f:
+        def replace_link(match):
+            return home_repl if match.group(0).startswith(b'<a ') else href_repl
+
+        content, count = HOME_LINK_RE.subn(replace_link, content)
+
+        # Use the substitution count rather than comparing whole buffers
+        if count:
+            with open(file_path, 'wb', buffering=IO_BUFFER_SIZE) as f:
                 f.write(content)
-            return True
-        return False
+            return file_path, True, None
+        return file_path, False, None
     except Exception as e:
-        print(f"Error processing {file_path}: {e}")
-        return False
+        return file_path, False, str(e)
+
+def _fix_home_links_worker(job):
+    """ProcessPoolExecutor entry point taking a (file_path, replacements) job"""
+    return fix_home_links_in_file(*job)
 
 def main():
     docs_root = "/home/ken/wip/fam/auntruth/docs"
@@ -51,33 +74,45 @@ def main():
         print(f"Error: {htm_root} does not exist")
         return 1
 
-    files_processed = 0
-    files_changed = 0
+    # Enumerate the L* directories once, building the per-level replacement
+    # table and a single job list covering every file in every level
+    jobs = []
+    with os.scandir(htm_root) as level_entries:
+        for level_entry in level_entries:
+            level_dir = level_entry.name
+            if not (level_dir.startswith('L') and level_entry.is_dir()):
+                continue
 
-    # Process all L* directories
-    for level_dir in os.listdir(htm_root):
-        if level_dir.startswith('L') and os.path.isdir(os.path.join(htm_root, level_dir)):
             try:
                 level = int(level_dir[1:])
-                relative_path = get_relative_path_to_home(level)
+            except ValueError:
+                print(f"Skipping non-numeric level directory: {level_dir}")
+                continue
+
+            relative_path = get_relative_path_to_home(level)
+            replacements = build_replacements(relative_path)
+            print(f"Processing {level_dir} with relative path: {relative_path}")
 
-                level_path = os.path.join(htm_root, level_dir)
-                print(f"Processing {level_dir} with relative path: {relative_path}")
+            with os.scandir(level_entry.path) as entries:
+                jobs.extend((entry.path, replacements)
+                            for entry in entries
+                            if entry.name.endswith('.htm'))
 
-                for filename in os.listdir(level_path):
-                    if filename.endswith('.htm'):
-                        file_path = os.path.join(level_path, filename)
-                        files_processed += 1
+    files_processed = 0
+    files_changed = 0
 
-                        if fix_home_links_in_file(file_path, relative_path):
-                            files_changed += 1
+    # Files are independent, so spread the rewrites across all CPUs
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        for file_path, changed, error in executor.map(_fix_home_links_worker, jobs, chunksize=128):
+            files_processed += 1
 
-                        if files_processed % 500 == 0:
-                            print(f"Processed {files_processed} files, changed {files_changed}")
+            if error:
+                print(f"Error processing {file_path}: {error}")
+            elif changed:
+                files_changed += 1
 
-            except ValueError:
-                print(f"Skipping non-numeric level directory: {level_dir}")
-                continue
+            if files_processed % PROGRESS_INTERVAL == 0:
+                print(f"Processed {files_processed} files, changed {files_changed}", file=sys.stderr)
 
     print(f"\nCompleted: Processed {files_processed} files, changed {files_changed}")
     return 0
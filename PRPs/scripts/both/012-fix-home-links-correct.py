@@ -1,8 +1,23 @@
 #!/usr/bin/env python3
 
+import mmap
 import os
 import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
+
+# The per-file work is one short substitution, so time goes on open/read/
+# write syscalls, which release the GIL; threads keep many in flight
+IO_WORKERS = 32
+
+# Excessive relative home links like ../../../../../../, compiled once at
+# import. Every token is ASCII, so match raw bytes and skip decoding.
+HOME_LINK_RE = re.compile(rb'<a href=[\'"](\.\./)+[\'"]>Home \|</a>')
+
+# Literal start and end of every HOME_LINK_RE match
+HOME_LINK_START = b'<a href='
+HOME_LINK_END = b'>Home |</a>'
 
 def get_relative_path_to_home(level):
     """Calculate relative path from Lx directory to htm directory (home)"""
@@ -10,29 +25,67 @@ def get_relative_path_to_home(level):
     # All Lx directories are one level deep within htm
     return "../"
 
+def iter_home_links(mm):
+    """Yield the HOME_LINK_RE matches in mm, located by plain substring search
+
+    Every match ends in '>Home |</a>' and begins at the last '<a href='
+    before it, as nothing in between can contain '<' or '>'. So find()
+    jumps between the link texts and the regex only checks the short
+    stretch in front of each one, rather than stopping at every '<a href='.
+    """
+    prev_end = 0
+    end = mm.find(HOME_LINK_END)
+    while end != -1:
+        end += len(HOME_LINK_END)
+        start = mm.rfind(HOME_LINK_START, prev_end, end)
+        if start != -1:
+            match = HOME_LINK_RE.match(mm, start, end)
+            if match:
+                yield match
+        prev_end = end
+        end = mm.find(HOME_LINK_END, end)
+
 def fix_home_links_in_file(file_path, relative_path):
-    """Fix home links in a single file"""
+    """Fix home links in a single file
+
+    Returns (file_path, changed, error) so the caller does the reporting.
+    """
+    home_link = f'<a href=\'{relative_path}\'>Home |</a>'.encode('ascii')
+
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
-
-        original_content = content
-
-        # Fix excessive relative paths like ../../../../../../ back to ../
-        content = re.sub(
-            r'<a href=[\'"](\.\.\/)+[\'"]>Home \|</a>',
-            f'<a href=\'{relative_path}\'>Home |</a>',
-            content
-        )
-
-        if content != original_content:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
-            return True
-        return False
+        # Scan a read-only mapping of the file rather than reading it all
+        # into memory. Empty files can't be mapped and have nothing to fix.
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return file_path, False, None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # Fix excessive relative paths like ../../../../../../ back
+                # to ../, skipping links that are already correct. Most files
+                # have no home link at all and cost a single find().
+                spans = [match.span() for match in iter_home_links(mm)
+                         if match.group() != home_link]
+                if not spans:
+                    return file_path, False, None
+
+                # Everything before the first changed link is already on
+                # disk, so only copy out the rest, with the links replaced
+                start = spans[0][0]
+                tail = bytearray()
+                pos = start
+                for match_start, match_end in spans:
+                    tail += mm[pos:match_start]
+                    tail += home_link
+                    pos = match_end
+                tail += mm[pos:]
+
+        # The mapping is closed before the file is truncated
+        with open(file_path, 'r+b') as f:
+            f.seek(start)
+            f.write(tail)
+            f.truncate()
+        return file_path, True, None
     except Exception as e:
-        print(f"Error processing {file_path}: {e}")
-        return False
+        return file_path, False, str(e)
 
 def main():
     docs_root = "/home/ken/wip/fam/auntruth/docs"
@@ -46,29 +99,41 @@ def main():
     files_changed = 0
 
     # Process all L* directories - they all need ../
-    for level_dir in os.listdir(htm_root):
-        if level_dir.startswith('L') and os.path.isdir(os.path.join(htm_root, level_dir)):
-            try:
-                level = int(level_dir[1:])
-                relative_path = get_relative_path_to_home(level)
+    with ThreadPoolExecutor(max_workers=IO_WORKERS) as executor:
+        with os.scandir(htm_root) as level_entries:
+            for level_entry in level_entries:
+                level_dir = level_entry.name
+                if not (level_dir.startswith('L') and level_entry.is_dir()):
+                    continue
+
+                try:
+                    level = int(level_dir[1:])
+                except ValueError:
+                    print(f"Skipping non-numeric level directory: {level_dir}")
+                    continue
 
-                level_path = os.path.join(htm_root, level_dir)
+                relative_path = get_relative_path_to_home(level)
                 print(f"Processing {level_dir} with relative path: {relative_path}")
 
-                for filename in os.listdir(level_path):
-                    if filename.endswith('.htm'):
-                        file_path = os.path.join(level_path, filename)
-                        files_processed += 1
-
-                        if fix_home_links_in_file(file_path, relative_path):
-                            files_changed += 1
-
-                        if files_processed % 500 == 0:
-                            print(f"Processed {files_processed} files, changed {files_changed}")
-
-            except ValueError:
-                print(f"Skipping non-numeric level directory: {level_dir}")
-                continue
+                # The directory entries already know their names and types,
+                # so no per-file join or stat is needed
+                with os.scandir(level_entry.path) as entries:
+                    file_paths = [entry.path for entry in entries
+                                  if entry.name.endswith('.htm')]
+
+                # Results come back in order, so the counters and progress
+                # lines are only ever touched from this thread
+                for file_path, changed, error in executor.map(
+                        fix_home_links_in_file, file_paths, repeat(relative_path)):
+                    files_processed += 1
+
+                    if error:
+                        print(f"Error processing {file_path}: {error}")
+                    elif changed:
+                        files_changed += 1
+
+                    if files_processed % 500 == 0:
+                        print(f"Processed {files_processed} files, changed {files_changed}")
 
     print(f"\nCompleted: Processed {files_processed} files, changed {files_changed}")
     return 0
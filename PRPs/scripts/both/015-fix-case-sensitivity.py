@@ -22,11 +22,48 @@ import os
 import re
 import argparse
 import logging
+import mmap
 import subprocess
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 from datetime import datetime
 from typing import List, Tuple, Dict
 
+# Shared helpers live one level up, in PRPs/scripts
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from _fswalk import iter_html_files
+
+# Concurrent curl checks in validate_fixes. Each check waits on the
+# network, not the CPU, so the count is independent of os.cpu_count()
+CURL_WORKERS = 16
+
+# Both wrong-case index spellings in one pattern, compiled once at import,
+# so each file is fixed with a single regex pass. The second group is the
+# spelling found. NO IGNORECASE - we want exact case matches. Bytes, so
+# files are fixed without decoding them.
+INDEX_CASE_RE = re.compile(rb'(/auntruth/htm/L[0-9]+/)(INDEX|Index)\.htm')
+
+# Either spelling on its own, for ruling files out. Its leading literal lets
+# the engine skip ahead, so this is one quick pass even over pages full of
+# correct /auntruth/htm/L<n>/index.htm links.
+INDEX_SPELLING_RE = re.compile(rb'I(?:NDEX|ndex)\.htm')
+
+# Issue type for each captured spelling, in reporting order, with the
+# single-spelling pattern the change log names
+ISSUE_TYPES = {
+    # Fix INDEX.htm → index.htm
+    b'INDEX': ('INDEX.htm', r'(/auntruth/htm/L[0-9]+/)INDEX\.htm'),
+
+    # Fix Index.htm → index.htm
+    b'Index': ('Index.htm', r'(/auntruth/htm/L[0-9]+/)Index\.htm'),
+}
+
+# Issue files between progress lines
+PROGRESS_INTERVAL = 50
+
 def setup_logging(log_file: str = None) -> logging.Logger:
     """Setup logging configuration"""
     logger = logging.getLogger(__name__)
@@ -62,42 +99,6 @@ def verify_git_branch(expected_branch: str = "fix-broken-links-fix-absolute-htm-
     except subprocess.CalledProcessError as e:
         raise ValueError(f"Failed to get current git branch: {e}")
 
-def find_case_sensitivity_issues(target_dir: str) -> Dict[str, List[str]]:
-    """Find HTML files with case sensitivity issues in index file references"""
-    issues_found = {
-        'INDEX.htm': [],
-        'Index.htm': []
-    }
-
-    print(f"🔍 Scanning {target_dir} for case sensitivity issues...")
-
-    patterns = [
-        r'/auntruth/htm/L[0-9]+/INDEX\.htm',   # Uppercase INDEX.htm
-        r'/auntruth/htm/L[0-9]+/Index\.htm',   # Title case Index.htm
-    ]
-
-    for root, dirs, files in os.walk(target_dir):
-        for file in files:
-            if file.endswith(('.htm', '.html')):
-                file_path = os.path.join(root, file)
-                try:
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-
-                    # Check for uppercase INDEX.htm (NO IGNORECASE - we want exact case matches)
-                    if re.search(patterns[0], content):
-                        issues_found['INDEX.htm'].append(file_path)
-
-                    # Check for title case Index.htm (NO IGNORECASE - we want exact case matches)
-                    if re.search(patterns[1], content):
-                        issues_found['Index.htm'].append(file_path)
-
-                except (OSError, IOError) as e:
-                    logging.warning(f"Could not read {file_path}: {e}")
-                    continue
-
-    return issues_found
-
 def test_url_with_curl(url: str, timeout: int = 3) -> int:
     """Test URL with curl and return HTTP status code"""
     try:
@@ -108,42 +109,87 @@ def test_url_with_curl(url: str, timeout: int = 3) -> int:
     except (subprocess.TimeoutExpired, subprocess.CalledProcessError, ValueError):
         return 0  # Treat as failure
 
-def fix_case_sensitivity_in_file(file_path: str) -> List[str]:
-    """Apply case sensitivity fixes to single file"""
+def write_changed_span(file_path: str, content: bytes, start: int, end: int) -> None:
+    """Write content[start:end] over the same span of the file
+
+    INDEX.htm and Index.htm are rewritten to the same-length index.htm, so
+    the file keeps its size and everything outside the span between the
+    first and last match is already on disk.
+    """
+    with open(file_path, 'r+b') as f:
+        f.seek(start)
+        f.write(memoryview(content)[start:end])
+
+def fix_case_sensitivity_in_file(file_path: str, dry_run: bool = False) -> Tuple[str, List[str], List[str], str]:
+    """Find and fix case sensitivity issues in a single file
+
+    Returns (file_path, issue_types, changes_made, error) so it can run in
+    a worker process; the caller does the logging. issue_types lists the
+    wrong spellings found. With dry_run the file is left untouched.
+    """
+    issue_types = []
     changes_made = []
 
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
+        # Check a read-only mapping of the file first: no copy into a Python
+        # object and no decode. Empty files can't be mapped and have nothing
+        # to fix.
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return file_path, [], [], None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # Most files contain neither spelling; one search rules
+                # them out before anything is read
+                if INDEX_SPELLING_RE.search(mm) is None:
+                    return file_path, [], [], None
+                raw = mm[:]
+
+        # One pass rewrites both spellings, counting each as it goes, so the
+        # fix itself finds the issues; any rewrite changes the content. The
+        # first and last match bound the bytes that change.
+        counts = Counter()
+        first_start = last_end = None
+
+        def lowercase_index(match):
+            nonlocal first_start, last_end
+            if first_start is None:
+                first_start = match.start()
+            last_end = match.end()
+            counts[match.group(2)] += 1
+            return match.group(1) + b'index.htm'
+
+        content = INDEX_CASE_RE.sub(lowercase_index, raw)
+        for spelling, (issue_type, pattern) in ISSUE_TYPES.items():
+            if counts[spelling]:
+                issue_types.append(issue_type)
+                changes_made.append(f"Fixed {counts[spelling]} instances of {pattern}")
+
+        # Write the file only if changes were made, and only the bytes that
+        # changed
+        if changes_made and not dry_run:
+            write_changed_span(file_path, content, first_start, last_end)
 
-        original_content = content
+    except Exception as e:
+        return file_path, [], [], str(e)
 
-        # Pattern fixes - convert uppercase/titlecase to lowercase
-        patterns_to_fix = [
-            # Fix INDEX.htm → index.htm
-            (r'(/auntruth/htm/L[0-9]+/)INDEX\.htm', r'\1index.htm'),
+    return file_path, issue_types, changes_made, None
 
-            # Fix Index.htm → index.htm
-            (r'(/auntruth/htm/L[0-9]+/)Index\.htm', r'\1index.htm'),
-        ]
+def iter_file_results(target_dir: str, dry_run: bool, limit: int = None):
+    """Yield fix_case_sensitivity_in_file results for every HTML file, in walk order
 
-        for old_pattern, new_pattern in patterns_to_fix:
-            old_content = content
-            content = re.sub(old_pattern, new_pattern, content)
-            if content != old_content:
-                matches = len(re.findall(old_pattern, old_content))
-                changes_made.append(f"Fixed {matches} instances of {old_pattern}")
+    Files are independent, so they are spread across all CPUs. A limited
+    run stays in this process instead, so the caller can stop as soon as
+    enough files have been fixed.
+    """
+    worker = partial(fix_case_sensitivity_in_file, dry_run=dry_run)
+    file_paths = iter_html_files(target_dir)
 
-        # Write the file only if changes were made
-        if content != original_content:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+    if limit:
+        yield from map(worker, file_paths)
+        return
 
-    except Exception as e:
-        logging.error(f"Error processing {file_path}: {e}")
-        return []
-
-    return changes_made
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        yield from executor.map(worker, file_paths, chunksize=64)
 
 def validate_fixes(test_cases: List[Tuple[str, str]]) -> Dict[str, int]:
     """Validate that fixes work by testing specific URLs"""
@@ -151,12 +197,18 @@ def validate_fixes(test_cases: List[Tuple[str, str]]) -> Dict[str, int]:
 
     print(f"🔬 Validating {len(test_cases)} URL fixes...")
 
+    # Fetch every URL at once so the round trips overlap; each URL is
+    # fetched once even if several test cases share it
+    urls = list(dict.fromkeys(url for test_case in test_cases for url in test_case))
+    with ThreadPoolExecutor(max_workers=CURL_WORKERS) as executor:
+        statuses = dict(zip(urls, executor.map(test_url_with_curl, urls)))
+
     for broken_url, fixed_url in test_cases:
         validation_results["total"] += 1
 
         # Test that broken URL is indeed broken
-        broken_status = test_url_with_curl(broken_url)
-        fixed_status = test_url_with_curl(fixed_url)
+        broken_status = statuses[broken_url]
+        fixed_status = statuses[fixed_url]
 
         if broken_status == 404 and fixed_status == 200:
             validation_results["success"] += 1
@@ -210,12 +262,40 @@ def main():
         logger.error(f"Git branch verification failed: {e}")
         return 1
 
-    # Find files with case sensitivity issues
-    issues_found = find_case_sensitivity_issues(args.target_dir)
+    # Scan and fix in a single pass, so each file is read once
+    print(f"🔍 Scanning {args.target_dir} for case sensitivity issues...")
+    # A dry run previews everything, so the limit only applies to real runs
+    limit = None if args.dry_run else args.limit
+    if limit:
+        print(f"📏 Limited to {limit} files for this run")
 
-    total_files = sum(len(files) for files in issues_found.values())
+    issues_found = {issue_type: [] for issue_type, _ in ISSUE_TYPES.values()}
+    files_processed = 0
+    files_fixed = 0
+    total_changes = 0
+
+    for file_path, issue_types, changes, error in iter_file_results(args.target_dir, args.dry_run, limit):
+        if error:
+            logger.error(f"Error processing {file_path}: {error}")
+            continue
+        if not issue_types:
+            continue
+
+        for issue_type in issue_types:
+            issues_found[issue_type].append(file_path)
+
+        if not args.dry_run:
+            if files_processed % PROGRESS_INTERVAL == 0:
+                print(f"Progress: {files_processed} files processed...")
+            files_fixed += 1
+            total_changes += len(changes)
+            logger.info(f"Fixed {file_path}: {', '.join(changes)}")
+        files_processed += 1
+
+        if limit and files_processed >= limit:
+            break
 
-    if total_files == 0:
+    if files_processed == 0:
         print("✅ No case sensitivity issues found")
         return 0
 
@@ -231,34 +311,10 @@ def main():
         print("Run without --dry-run to apply changes")
         return 0
 
-    # Process files
-    print(f"\n🔧 Processing {total_files} files...")
-    files_fixed = 0
-    total_changes = 0
-
-    all_files = []
-    for files in issues_found.values():
-        all_files.extend(files)
-
-    # Apply limit if specified
-    if args.limit:
-        all_files = all_files[:args.limit]
-        print(f"📏 Limited to {len(all_files)} files for this run")
-
-    for i, file_path in enumerate(all_files):
-        if i % 50 == 0:
-            print(f"Progress: {i}/{len(all_files)} files processed...")
-
-        changes = fix_case_sensitivity_in_file(file_path)
-        if changes:
-            files_fixed += 1
-            total_changes += len(changes)
-            logger.info(f"Fixed {file_path}: {', '.join(changes)}")
-
     # Summary
     print(f"\n📋 PROCESSING COMPLETE")
     print("=" * 60)
-    print(f"Files processed: {len(all_files)}")
+    print(f"Files processed: {files_processed}")
     print(f"Files fixed: {files_fixed}")
     print(f"Total changes: {total_changes}")
 
@@ -26,10 +26,50 @@ import re
 import argparse
 import logging
 import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 from datetime import datetime
 from typing import List, Tuple, Dict
 
+# Shared helpers live one level up, in PRPs/scripts
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from _fswalk import iter_html_files
+
+# Every fix pattern contains this. They ignore case, so it is
+# looked for in a lowercased copy of the file; that copy and one substring
+# search cost a small fraction of a regex pass, and most files have no
+# /jpg/ paths at all.
+JPG_LITERAL = b'/jpg/'
+
+# Pattern fixes based on actual broken link analysis
+# Convert absolute /jpg/ paths to /auntruth/jpg/ paths. Compiled once at
+# import rather than looked up in the re cache for every file. All the
+# patterns are ASCII bytes patterns, so files are never decoded.
+PATTERNS_TO_FIX = [
+    # Fix src/href attributes with either quote: "/jpg/" -> "/auntruth/jpg/"
+    (re.compile(rb'((?:src|href)=["\'])/jpg/', re.IGNORECASE), rb'\1/auntruth/jpg/'),
+
+    # Fix CSS url() patterns: url(/jpg/...) -> url(/auntruth/jpg/...). This
+    # includes background-image: url(/jpg/...), so those need no pattern of
+    # their own
+    (re.compile(rb'url\((["\']?)/jpg/', re.IGNORECASE), rb'url(\1/auntruth/jpg/'),
+]
+
+# Concurrent curl checks in validate_sample_fixes. Each check waits on the
+# network, not the CPU, so the count is independent of os.cpu_count()
+CURL_WORKERS = 16
+
+# jpg URLs in src/href attributes, for validating fixed files
+JPG_URL_RE = re.compile(r'(src|href)=["\']([^"\']*\.jpg)["\']', re.IGNORECASE)
+
+# Example image paths shown in the dry-run preview
+PREVIEW_PATTERNS = [
+    re.compile(rb'(src|href)="[^"]*/(auntruth/)?htm/jpg/[^"]*"', re.IGNORECASE),
+    re.compile(rb"(src|href)='[^']*/(auntruth/)?htm/jpg/[^']*'", re.IGNORECASE),
+]
+
 def setup_logging(log_file: str = None) -> logging.Logger:
     """Setup logging configuration"""
     logger = logging.getLogger(__name__)
@@ -63,83 +103,66 @@ def verify_git_branch(expected_branch: str = "task-015-broken-links-fix") -> str
     except subprocess.CalledProcessError as e:
         raise ValueError(f"Failed to get current git branch: {e}")
 
-def scan_files_with_broken_image_paths(target_dir: str) -> List[str]:
-    """Find HTML files with absolute /jpg/ patterns that need fixing to /auntruth/jpg/"""
-    affected_files = []
+def fix_image_paths_in_file(file_path: str, dry_run: bool = False) -> Tuple[str, List[str], str]:
+    """Find and apply image path fixes in a single file
 
-    print(f"🔍 Scanning {target_dir} for broken image path patterns...")
-
-    # Patterns to detect broken image paths - absolute paths that need /auntruth/ prefix
-    patterns = [
-        r'(src|href)="/jpg/',   # src="/jpg/filename.jpg" - needs to become src="/auntruth/jpg/filename.jpg"
-        r"(src|href)='/jpg/",   # src='/jpg/filename.jpg' - needs to become src='/auntruth/jpg/filename.jpg'
-        r'url\(["\']?/jpg/',    # url(/jpg/...) - needs to become url(/auntruth/jpg/...)
-        r'background-image:\s*url\(["\']?/jpg/',  # background-image: url(/jpg/...)
-    ]
-
-    for root, dirs, files in os.walk(target_dir):
-        for file in files:
-            if file.endswith(('.htm', '.html')):
-                file_path = os.path.join(root, file)
-                try:
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-
-                    # Check if any pattern matches
-                    for pattern in patterns:
-                        if re.search(pattern, content, re.IGNORECASE):
-                            affected_files.append(file_path)
-                            break  # File already added, no need to check other patterns
-
-                except (OSError, IOError) as e:
-                    logging.warning(f"Could not read {file_path}: {e}")
-                    continue
-
-    return affected_files
-
-def fix_image_paths_in_file(file_path: str) -> List[str]:
-    """Apply image path fixes to single file"""
+    Returns (file_path, changes_made, error) so it can run in a worker
+    process; the caller does the logging. A file needs fixing exactly when
+    changes_made is non-empty. With dry_run the file is left untouched.
+    """
     changes_made = []
 
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+        with open(file_path, 'rb') as f:
             content = f.read()
 
-        original_content = content
+        # Nothing to fix without a /jpg/ path - skip the regex passes
+        if JPG_LITERAL not in content.lower():
+            return file_path, [], None
 
-        # Pattern fixes based on actual broken link analysis
-        # Convert absolute /jpg/ paths to /auntruth/jpg/ paths
-        patterns_to_fix = [
-            # Fix src/href attributes with double quotes: "/jpg/" -> "/auntruth/jpg/"
-            (r'(src|href)="/jpg/', r'\1="/auntruth/jpg/'),
+        # subn counts the matches in the same pass that replaces them. Every
+        # replacement inserts /auntruth, so a match always changes the file.
+        for old_re, new_pattern in PATTERNS_TO_FIX:
+            content, matches = old_re.subn(new_pattern, content)
+            if matches:
+                changes_made.append(f"Fixed {matches} instances of pattern: {old_re.pattern.decode('ascii')}")
 
-            # Fix src/href attributes with single quotes: '/jpg/' -> '/auntruth/jpg/'
-            (r"(src|href)='/jpg/", r"\1='/auntruth/jpg/"),
+        # Write the file only if changes were made
+        if changes_made and not dry_run:
+            with open(file_path, 'wb') as f:
+                f.write(content)
 
-            # Fix CSS url() patterns: url(/jpg/...) -> url(/auntruth/jpg/...)
-            (r'url\((["\']?)/jpg/', r'url(\1/auntruth/jpg/'),
+    except Exception as e:
+        return file_path, [], str(e)
 
-            # Fix background-image patterns: background-image: url(/jpg/...) -> background-image: url(/auntruth/jpg/...)
-            (r'background-image:\s*url\((["\']?)/jpg/', r'background-image: url(\1/auntruth/jpg/'),
-        ]
+    return file_path, changes_made, None
 
-        for old_pattern, new_pattern in patterns_to_fix:
-            old_content = content
-            content = re.sub(old_pattern, new_pattern, content, flags=re.IGNORECASE)
-            if content != old_content:
-                matches = len(re.findall(old_pattern, old_content, re.IGNORECASE))
-                changes_made.append(f"Fixed {matches} instances of pattern: {old_pattern}")
+def iter_file_results(target_dir: str, dry_run: bool, limit: int = None):
+    """Yield fix_image_paths_in_file results for every HTML file, in walk order
 
-        # Write the file only if changes were made
-        if content != original_content:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+    Files are independent, so they are spread across all CPUs. A limited
+    run stays in this process instead, so the caller can stop as soon as
+    enough files have been found.
+    """
+    worker = partial(fix_image_paths_in_file, dry_run=dry_run)
+    file_paths = iter_html_files(target_dir)
 
-    except Exception as e:
-        logging.error(f"Error processing {file_path}: {e}")
-        return []
+    if limit:
+        yield from map(worker, file_paths)
+        return
 
-    return changes_made
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        yield from executor.map(worker, file_paths, chunksize=64)
+
+def test_url_with_curl(url: str, timeout: int = 5) -> int:
+    """Test URL with curl and return HTTP status code"""
+    try:
+        result = subprocess.run([
+            'curl', '-s', '-o', '/dev/null', '-w', '%{http_code}', url
+        ], capture_output=True, text=True, timeout=timeout)
+        return int(result.stdout.strip())
+    except (subprocess.TimeoutExpired, subprocess.CalledProcessError, ValueError):
+        return 0  # Treat as failure
 
 def validate_sample_fixes(processed_files: List[str], sample_size: int = 10) -> Dict[str, int]:
     """Validate that a sample of fixes work by testing URLs with curl"""
@@ -153,39 +176,42 @@ def validate_sample_fixes(processed_files: List[str], sample_size: int = 10) ->
 
     print(f"🔬 Validating sample of {len(sample_files)} fixed files...")
 
+    test_urls = []
     for file_path in sample_files:
         try:
             with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
                 content = f.read()
 
             # Extract jpg URLs that we fixed
-            jpg_urls = re.findall(r'(src|href)=["\']([^"\']*\.jpg)["\']', content, re.IGNORECASE)
+            jpg_urls = JPG_URL_RE.findall(content)
 
             for attr, url in jpg_urls[:3]:  # Test up to 3 URLs per file
                 if url.startswith('/auntruth/') or url.startswith('/jpg/'):
-                    test_url = f"http://localhost:8000{url}"
-
-                    validation_results["total"] += 1
-
-                    # Test URL with curl
-                    try:
-                        result = subprocess.run([
-                            'curl', '-s', '-o', '/dev/null', '-w', '%{http_code}', test_url
-                        ], capture_output=True, text=True, timeout=5)
-
-                        if result.stdout.strip() == '200':
-                            validation_results["success"] += 1
-                        else:
-                            validation_results["failed"] += 1
-                            logging.warning(f"URL still broken: {test_url} (HTTP {result.stdout.strip()})")
-
-                    except (subprocess.TimeoutExpired, subprocess.CalledProcessError):
-                        validation_results["failed"] += 1
-                        logging.warning(f"Could not test URL: {test_url}")
+                    test_urls.append(f"http://localhost:8000{url}")
 
         except Exception as e:
             logging.warning(f"Could not validate {file_path}: {e}")
 
+    # Fetch every URL at once so the round trips overlap; each URL is
+    # fetched once even if several sampled files share it
+    unique_urls = list(dict.fromkeys(test_urls))
+    with ThreadPoolExecutor(max_workers=CURL_WORKERS) as executor:
+        statuses = dict(zip(unique_urls, executor.map(test_url_with_curl, unique_urls)))
+
+    for test_url in test_urls:
+        validation_results["total"] += 1
+        status = statuses[test_url]
+
+        # 0 means curl got no HTTP response at all
+        if status == 0:
+            validation_results["failed"] += 1
+            logging.warning(f"Could not test URL: {test_url}")
+        elif status == 200:
+            validation_results["success"] += 1
+        else:
+            validation_results["failed"] += 1
+            logging.warning(f"URL still broken: {test_url} (HTTP {status})")
+
     return validation_results
 
 def show_dry_run_preview(affected_files: List[str], limit: int = 10) -> None:
@@ -199,23 +225,19 @@ def show_dry_run_preview(affected_files: List[str], limit: int = 10) -> None:
         print(f"{i}. {file_path}")
 
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            with open(file_path, 'rb') as f:
                 content = f.read()
 
             # Show examples of what would be fixed
             examples = []
-            patterns = [
-                r'(src|href)="[^"]*/(auntruth/)?htm/jpg/[^"]*"',
-                r"(src|href)='[^']*/(auntruth/)?htm/jpg/[^']*'",
-            ]
-
-            for pattern in patterns:
-                matches = re.findall(pattern, content, re.IGNORECASE)
+            for pattern in PREVIEW_PATTERNS:
+                matches = pattern.findall(content)
                 examples.extend(matches[:2])  # Show up to 2 examples per pattern
 
             if examples:
                 for example in examples[:3]:  # Show up to 3 examples total
-                    print(f"   Example: {example}")
+                    # The captured groups are ASCII - (src|href) and auntruth/
+                    print(f"   Example: {tuple(group.decode('ascii') for group in example)}")
 
         except Exception as e:
             print(f"   Could not preview: {e}")
@@ -248,8 +270,34 @@ def main():
         logger.error(f"Git branch verification failed: {e}")
         return 1
 
-    # Scan for affected files
-    affected_files = scan_files_with_broken_image_paths(args.target_dir)
+    # Find and fix in a single pass, so each file is read once
+    print(f"🔍 Scanning {args.target_dir} for broken image path patterns...")
+    if args.limit:
+        print(f"📏 Limited to {args.limit} files for this run")
+
+    affected_files = []
+    files_fixed = 0
+    total_changes = 0
+    errors = []
+
+    for file_path, changes, error in iter_file_results(args.target_dir, args.dry_run, args.limit):
+        if error:
+            errors.append(file_path)
+            logger.error(f"Error processing {file_path}: {error}")
+            continue
+        if not changes:
+            continue
+
+        if not args.dry_run:
+            if len(affected_files) % 100 == 0:
+                print(f"Progress: {len(affected_files)} files processed...")
+            files_fixed += 1
+            total_changes += len(changes)
+            logger.info(f"Fixed {file_path}: {', '.join(changes)}")
+        affected_files.append(file_path)
+
+        if args.limit and len(affected_files) >= args.limit:
+            break
 
     if not affected_files:
         print("✅ No files found with broken image path patterns")
@@ -257,11 +305,6 @@ def main():
 
     print(f"📊 Found {len(affected_files)} files with broken image paths")
 
-    # Apply limit if specified
-    if args.limit:
-        affected_files = affected_files[:args.limit]
-        print(f"📏 Limited to {len(affected_files)} files for this run")
-
     # Dry run mode
     if args.dry_run:
         show_dry_run_preview(affected_files)
@@ -269,26 +312,6 @@ def main():
         print("Run without --dry-run to apply changes")
         return 0
 
-    # Process files
-    print(f"\n🔧 Processing {len(affected_files)} files...")
-    files_fixed = 0
-    total_changes = 0
-    errors = []
-
-    for i, file_path in enumerate(affected_files):
-        if i % 100 == 0:
-            print(f"Progress: {i}/{len(affected_files)} files processed...")
-
-        changes = fix_image_paths_in_file(file_path)
-        if changes:
-            files_fixed += 1
-            total_changes += len(changes)
-            logger.info(f"Fixed {file_path}: {', '.join(changes)}")
-
-        # Log errors but continue processing
-        if not changes:
-            logger.debug(f"No changes needed for {file_path}")
-
     # Summary
     print(f"\n📋 PROCESSING COMPLETE")
     print("=" * 60)
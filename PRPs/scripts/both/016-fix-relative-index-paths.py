@@ -25,10 +25,30 @@ import re
 import argparse
 import logging
 import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
 from typing import List, Tuple, Dict
 
+# Shared helpers live one level up, in PRPs/scripts
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from _fswalk import iter_html_files
+
+# Pattern to find ./index.html references, compiled once at import. It is
+# ASCII, so it runs over the raw file bytes without decoding them.
+INDEX_REF_RE = re.compile(rb'href\s*=\s*["\']\.\/index\.html?["\']', re.IGNORECASE)
+
+# Patterns to fix - replace ./index.html with the correct relative path,
+# keyed by the quote character the replacement keeps
+INDEX_FIX_PATTERNS = [
+    # Double quotes
+    (re.compile(rb'href\s*=\s*"\.\/index\.html?"', re.IGNORECASE), '"'),
+    # Single quotes
+    (re.compile(rb"href\s*=\s*'\.\/index\.html?'", re.IGNORECASE), "'"),
+]
+
 def setup_logging(log_file: str = None) -> logging.Logger:
     """Setup logging configuration"""
     logger = logging.getLogger(__name__)
@@ -62,11 +82,13 @@ def verify_git_branch(expected_branch: str = "task-015-broken-links-fix") -> str
     except subprocess.CalledProcessError as e:
         raise ValueError(f"Failed to get current git branch: {e}")
 
-def calculate_relative_path_to_index(file_path: str, base_dir: str) -> str:
-    """Calculate correct relative path from file to index.html in base directory"""
-    # Get the directory containing the HTML file
-    file_dir = os.path.dirname(file_path)
+@lru_cache(maxsize=None)
+def calculate_relative_path_to_index(file_dir: str, base_dir: str) -> str:
+    """Calculate correct relative path from a file's directory to index.html in base directory
 
+    Memoized: the answer only depends on the directory, and a tree has far
+    fewer directories than files.
+    """
     # Calculate relative path from file directory to base directory
     rel_path = os.path.relpath(base_dir, file_dir)
 
@@ -76,17 +98,30 @@ def calculate_relative_path_to_index(file_path: str, base_dir: str) -> str:
     else:
         return f"{rel_path}/index.html"
 
+def find_index_dir(file_dir: str, index_locations: List[str]) -> str:
+    """Return the first of index_locations that contains file_dir, or None"""
+    for index_dir in index_locations:
+        # Check if this index directory is a parent of the file
+        try:
+            dir_rel = os.path.relpath(file_dir, index_dir)
+            if not dir_rel.startswith('..'):
+                return index_dir
+        except ValueError:
+            continue
+    return None
+
 def scan_files_with_broken_index_refs(target_dir: str) -> List[Tuple[str, str]]:
     """Find files with ./index.html patterns and calculate correct paths"""
     affected_files = []
 
     print(f"🔍 Scanning {target_dir} for broken index reference patterns...")
 
-    # Find the base directory where index.html actually exists
-    index_locations = []
-    for root, dirs, files in os.walk(target_dir):
-        if 'index.html' in files or 'index.htm' in files:
-            index_locations.append(root)
+    # One walk finds both the HTML files and the directories where
+    # index.html actually exists
+    html_files = list(iter_html_files(target_dir))
+    index_locations = list(dict.fromkeys(
+        os.path.dirname(file_path) for file_path in html_files
+        if os.path.basename(file_path) in ('index.html', 'index.htm')))
 
     if not index_locations:
         print("❌ No index.html files found in target directory")
@@ -94,78 +129,79 @@ def scan_files_with_broken_index_refs(target_dir: str) -> List[Tuple[str, str]]:
 
     print(f"📍 Found index files in: {', '.join(index_locations)}")
 
-    # Pattern to find ./index.html references
-    pattern = r'href\s*=\s*["\']\.\/index\.html?["\']'
-
-    for root, dirs, files in os.walk(target_dir):
-        for file in files:
-            if file.endswith(('.htm', '.html')):
-                file_path = os.path.join(root, file)
-                try:
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-
-                    # Check if file contains ./index.html pattern
-                    if re.search(pattern, content, re.IGNORECASE):
-                        # For each file, find the closest index.html
-                        closest_index_dir = None
-                        for index_dir in index_locations:
-                            # Check if this index directory is a parent of the file
-                            try:
-                                file_rel = os.path.relpath(file_path, index_dir)
-                                if not file_rel.startswith('..'):
-                                    closest_index_dir = index_dir
-                                    break
-                            except ValueError:
-                                continue
-
-                        if closest_index_dir:
-                            correct_path = calculate_relative_path_to_index(file_path, closest_index_dir)
-                            # Only add if the correct path is different from current
-                            if correct_path != "./index.html":
-                                affected_files.append((file_path, correct_path))
-
-                except (OSError, IOError) as e:
-                    logging.warning(f"Could not read {file_path}: {e}")
-                    continue
+    # The closest index.html for each directory, looked up once per
+    # directory rather than once per file
+    index_dir_for = {}
+
+    for file_path in html_files:
+        try:
+            # Read the whole file rather than searching a memory map: the
+            # gate below needs a lowercased copy anyway, and the pattern has
+            # no case-free literal long enough to search a map quickly
+            with open(file_path, 'rb') as f:
+                content = f.read()
+
+            # Check if file contains ./index.html pattern. The pattern
+            # ignores case, so first look for its literal core in a
+            # lowercased copy - far cheaper than the regex, and most
+            # files don't have it
+            if b'./index.htm' in content.lower() and INDEX_REF_RE.search(content):
+                # For each file, find the closest index.html
+                file_dir = os.path.dirname(file_path)
+                if file_dir not in index_dir_for:
+                    index_dir_for[file_dir] = find_index_dir(file_dir, index_locations)
+                closest_index_dir = index_dir_for[file_dir]
+
+                if closest_index_dir:
+                    correct_path = calculate_relative_path_to_index(file_dir, closest_index_dir)
+                    # Only add if the correct path is different from current
+                    if correct_path != "./index.html":
+                        affected_files.append((file_path, correct_path))
+
+        except (OSError, IOError) as e:
+            logging.warning(f"Could not read {file_path}: {e}")
+            continue
 
     return affected_files
 
-def fix_index_paths_in_file(file_path: str, correct_path: str) -> List[str]:
-    """Fix index references in single file"""
+def fix_index_paths_in_file(file_path: str, correct_path: str) -> Tuple[str, List[str], str]:
+    """Fix index references in single file
+
+    Returns (file_path, changes_made, error) so it can run in a worker
+    process; the caller does the logging.
+    """
     changes_made = []
 
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+        with open(file_path, 'rb') as f:
             content = f.read()
 
         original_content = content
 
-        # Patterns to fix - replace ./index.html with the correct relative path
-        patterns_to_fix = [
-            # Double quotes
-            (r'href\s*=\s*"\.\/index\.html?"', f'href="{correct_path}"'),
-            # Single quotes
-            (r"href\s*=\s*'\.\/index\.html?'", f"href='{correct_path}'"),
-        ]
-
-        for old_pattern, new_pattern in patterns_to_fix:
+        # Matched and replaced as bytes, so the file is never decoded. subn
+        # counts the matches in the same pass that replaces them.
+        for old_re, quote in INDEX_FIX_PATTERNS:
+            new_pattern = f'href={quote}{correct_path}{quote}'.encode('utf-8')
             old_content = content
-            content = re.sub(old_pattern, new_pattern, content, flags=re.IGNORECASE)
-            if content != old_content:
-                matches = len(re.findall(old_pattern, old_content, re.IGNORECASE))
+            content, matches = old_re.subn(new_pattern, content)
+            # A file already linking to ./index.html from the index directory
+            # matches without changing, which is not a fix
+            if matches and content != old_content:
                 changes_made.append(f"Fixed {matches} instances: ./index.html → {correct_path}")
 
         # Write the file only if changes were made
         if content != original_content:
-            with open(file_path, 'w', encoding='utf-8') as f:
+            with open(file_path, 'wb') as f:
                 f.write(content)
 
     except Exception as e:
-        logging.error(f"Error processing {file_path}: {e}")
-        return []
+        return file_path, [], str(e)
 
-    return changes_made
+    return file_path, changes_made, None
+
+def _fix_index_paths_worker(job: Tuple[str, str]) -> Tuple[str, List[str], str]:
+    """ProcessPoolExecutor entry point taking a (file_path, correct_path) job"""
+    return fix_index_paths_in_file(*job)
 
 def validate_sample_fixes(processed_files: List[Tuple[str, str]], sample_size: int = 10) -> Dict[str, int]:
     """Validate that a sample of fixes work by checking if target index files exist"""
@@ -211,13 +247,13 @@ def show_dry_run_preview(affected_files: List[Tuple[str, str]], limit: int = 10)
 
         # Show the actual line that would be changed
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            with open(file_path, 'rb') as f:
                 content = f.read()
 
             # Find the href line
-            match = re.search(r'.*href\s*=\s*["\']\.\/index\.html?["\'].*', content, re.IGNORECASE)
+            match = re.search(rb'.*href\s*=\s*["\']\.\/index\.html?["\'].*', content, re.IGNORECASE)
             if match:
-                line = match.group(0).strip()[:100]  # Limit line length
+                line = match.group(0).decode('utf-8', errors='ignore').strip()[:100]  # Limit line length
                 print(f"   Example: {line}")
 
         except Exception as e:
@@ -278,19 +314,23 @@ def main():
     total_changes = 0
     errors = []
 
-    for i, (file_path, correct_path) in enumerate(affected_files):
-        if i % 100 == 0:
-            print(f"Progress: {i}/{len(affected_files)} files processed...")
-
-        changes = fix_index_paths_in_file(file_path, correct_path)
-        if changes:
-            files_fixed += 1
-            total_changes += len(changes)
-            logger.info(f"Fixed {file_path}: {', '.join(changes)}")
-
-        # Log errors but continue processing
-        if not changes:
-            logger.debug(f"No changes needed for {file_path}")
+    # Files are independent, so spread the fixes across all CPUs; results
+    # come back in list order
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        results = executor.map(_fix_index_paths_worker, affected_files, chunksize=64)
+        for i, (file_path, changes, error) in enumerate(results):
+            if i % 100 == 0:
+                print(f"Progress: {i}/{len(affected_files)} files processed...")
+
+            if error:
+                errors.append(file_path)
+                logger.error(f"Error processing {file_path}: {error}")
+            elif changes:
+                files_fixed += 1
+                total_changes += len(changes)
+                logger.info(f"Fixed {file_path}: {', '.join(changes)}")
+            else:
+                logger.debug(f"No changes needed for {file_path}")
 
     # Summary
     print(f"\n📋 PROCESSING COMPLETE")
@@ -4,44 +4,72 @@ Generate updated broken links report after applying fixes.
 Scans for remaining broken links and compares with original analysis.
 """
 
+import functools
 import os
 import re
 import sys
 from collections import defaultdict, Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+# Shared helpers live one level up, in PRPs/scripts
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from _fswalk import iter_html_files
+
+# 128 KB read buffer for HTML files
+IO_BUFFER_SIZE = 128 * 1024
+
+# href and src attribute values in one alternation, so each file is scanned
+# once; compiled at import rather than on every file. It runs over the raw
+# bytes - the attribute syntax is ASCII - so only captured links get decoded.
+LINK_ATTR_RE = re.compile(rb'(?:href|src)\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
+
+# Links that point off-site or within the page; bytes.startswith takes the tuple
+SKIP_PREFIXES = (b'http://', b'https://', b'mailto:', b'javascript:', b'ftp://', b'#')
+
+def decode_link(raw_link):
+    """Decode a captured link as a text-mode read of the file would have"""
+    link = raw_link.decode('utf-8', errors='ignore')
+    if '\r' in link:
+        # Universal newlines, for the rare attribute value spanning lines
+        link = link.replace('\r\n', '\n').replace('\r', '\n')
+    return link
+
+@functools.lru_cache(maxsize=None)
+def path_exists(path):
+    """os.path.exists, cached per process
+
+    Pages in a directory share the same link targets (index pages, images,
+    sibling pages), so most lookups repeat a path already stat'd.
+    """
+    return os.path.exists(path)
 
 def find_html_files(directory):
     """Find all HTML files in directory"""
-    html_files = []
-    for root, dirs, files in os.walk(directory):
-        for file in files:
-            if file.lower().endswith(('.htm', '.html')):
-                html_files.append(os.path.join(root, file))
-    return html_files
+    return list(iter_html_files(directory, ignore_case=True))
 
 def analyze_links_in_file(filepath, base_dir):
     """Analyze all links in a single HTML file"""
     issues = []
 
     try:
-        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
+        with open(filepath, 'rb', buffering=IO_BUFFER_SIZE) as f:
             content = f.read()
     except Exception as e:
         return [f"ERROR: Could not read {filepath}: {e}"]
 
-    # Find all href links
-    href_pattern = r'href\s*=\s*["\']([^"\']+)["\']'
-    links = re.findall(href_pattern, content, re.IGNORECASE)
-
-    # Find all src links
-    src_pattern = r'src\s*=\s*["\']([^"\']+)["\']'
-    src_links = re.findall(src_pattern, content, re.IGNORECASE)
+    # Find all href and src links, in document order
+    links = LINK_ATTR_RE.findall(content)
 
+    # Per-file constants, worked out once rather than for every link
     rel_path = os.path.relpath(filepath, base_dir)
+    file_dir = os.path.dirname(filepath)
 
-    for link in links + src_links:
+    for raw_link in links:
         # Skip external URLs, mailto, javascript, etc.
-        if any(link.startswith(prefix) for prefix in ['http://', 'https://', 'mailto:', 'javascript:', 'ftp://', '#']):
+        if raw_link.startswith(SKIP_PREFIXES):
             continue
+        link = decode_link(raw_link)
 
         # Check for remaining issues
         if 'XF0.htm' in link:
@@ -54,23 +82,14 @@ def analyze_links_in_file(filepath, base_dir):
             issues.append(f"REMAINING Word artifact: {rel_path} -> {link}")
 
         # Check for broken file references
-        if link.startswith('./') or link.startswith('../') or (not link.startswith('/') and not ':' in link):
+        if link.startswith(('./', '../')) or (not link.startswith('/') and not ':' in link):
             # Resolve relative path
-            file_dir = os.path.dirname(filepath)
-            if link.startswith('./'):
-                target_path = os.path.join(file_dir, link[2:])
-            elif link.startswith('../'):
-                target_path = os.path.normpath(os.path.join(file_dir, link))
-            else:
-                target_path = os.path.join(file_dir, link)
-
-            target_path = os.path.normpath(target_path)
+            target_path = os.path.normpath(os.path.join(file_dir, link[2:] if link.startswith('./') else link))
 
             # Remove fragment identifier
-            if '#' in target_path:
-                target_path = target_path.split('#')[0]
+            target_path = target_path.partition('#')[0]
 
-            if target_path and not os.path.exists(target_path):
+            if target_path and not path_exists(target_path):
                 issues.append(f"BROKEN FILE LINK: {rel_path} -> {link} (target: {target_path})")
 
     return issues
@@ -95,26 +114,29 @@ def main():
     all_issues = []
     issue_categories = defaultdict(int)
 
-    for i, filepath in enumerate(html_files, 1):
-        if i % 1000 == 0:
-            print(f"Processed {i}/{len(html_files)} files...")
-
-        issues = analyze_links_in_file(filepath, directory)
-        all_issues.extend(issues)
-
-        for issue in issues:
-            if 'XF0 link' in issue:
-                issue_categories['Remaining XF0 links'] += 1
-            elif 'CGI counter' in issue:
-                issue_categories['Remaining CGI counters'] += 1
-            elif 'backslash path' in issue:
-                issue_categories['Remaining backslash paths'] += 1
-            elif 'Word artifact' in issue:
-                issue_categories['Remaining Word artifacts'] += 1
-            elif 'BROKEN FILE LINK' in issue:
-                issue_categories['Broken file links'] += 1
-            else:
-                issue_categories['Other issues'] += 1
+    # Files are independent, so analyze them across all CPUs; results come
+    # back in file order, keeping the report stable
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        results = executor.map(analyze_links_in_file, html_files, repeat(directory), chunksize=64)
+        for i, issues in enumerate(results, 1):
+            if i % 1000 == 0:
+                print(f"Processed {i}/{len(html_files)} files...")
+
+            all_issues.extend(issues)
+
+            for issue in issues:
+                if 'XF0 link' in issue:
+                    issue_categories['Remaining XF0 links'] += 1
+                elif 'CGI counter' in issue:
+                    issue_categories['Remaining CGI counters'] += 1
+                elif 'backslash path' in issue:
+                    issue_categories['Remaining backslash paths'] += 1
+                elif 'Word artifact' in issue:
+                    issue_categories['Remaining Word artifacts'] += 1
+                elif 'BROKEN FILE LINK' in issue:
+                    issue_categories['Broken file links'] += 1
+                else:
+                    issue_categories['Other issues'] += 1
 
     print(f"Analysis complete!")
     print()
@@ -16,6 +16,43 @@ import sys
 import argparse
 from pathlib import Path
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from _fswalk import iter_html_files
+
+# 128 KB buffers for reading and writing HTML files
+IO_BUFFER_SIZE = 128 * 1024
+
+# CSS background images
+_BACKGROUND_PATTERN = rb'background[^:]*:\s*url\(["\']?(?P<background>[^"\'()]+)["\']?\)'
+
+# img src attributes and CSS background images in one alternation, so each
+# file is scanned once; the named group that matched gives the reference type.
+# Matched against raw bytes so pages are never decoded as a whole.
+_IMAGE_REF_RE = re.compile(
+    rb'<img[^>]+src=["\'](?P<img>[^"\']+)["\'][^>]*>|' + _BACKGROUND_PATTERN,
+    re.IGNORECASE
+)
+
+# Background images inside a matched <img> tag's style attribute, which the
+# alternation has already consumed as part of the tag
+_BACKGROUND_RE = re.compile(_BACKGROUND_PATTERN, re.IGNORECASE)
+
+# Extensions indexed as images in docs/jpg
+_IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.bmp')
+
+def _iter_image_refs(html_content):
+    """Yield (type, src bytes, start, end) for each image reference in document order"""
+    # Find img tags and background images in a single pass
+    for match in _IMAGE_REF_RE.finditer(html_content):
+        img_type = match.lastgroup
+        yield img_type, match.group(img_type), match.start(), match.end()
+
+        # A background inside the img tag itself, e.g. in its style attribute
+        if img_type == 'img':
+            for bg_match in _BACKGROUND_RE.finditer(html_content, match.start(), match.end()):
+                yield 'background', bg_match.group('background'), bg_match.start(), bg_match.end()
 
 class ImageCaseChecker:
     def __init__(self, docs_path="/home/ken/wip/fam/auntruth/docs"):
@@ -41,34 +78,22 @@ class ImageCaseChecker:
             print(f"Warning: jpg directory not found at {self.jpg_path}")
             return
 
-        for img_file in self.jpg_path.iterdir():
-            if img_file.is_file() and img_file.suffix.lower() in ['.jpg', '.jpeg', '.png', '.gif', '.bmp']:
-                # Store both the actual filename and lowercase version for lookup
-                self.actual_images[img_file.name.lower()] = img_file.name
+        # os.scandir reuses the readdir type info, so no stat() per image
+        with os.scandir(self.jpg_path) as entries:
+            for entry in entries:
+                name = entry.name
+                name_lower = name.lower()
+                if name_lower.endswith(_IMAGE_EXTENSIONS) and entry.is_file():
+                    # Store both the actual filename and lowercase version for lookup
+                    self.actual_images[name_lower] = name
 
         print(f"Found {len(self.actual_images)} image files")
 
     def extract_image_references(self, html_content):
-        """Extract all image references from HTML content"""
-        # Pattern for img src attributes
-        img_pattern = r'<img[^>]+src=["\']([^"\']+)["\'][^>]*>'
-
-        # Pattern for background images in CSS
-        bg_pattern = r'background[^:]*:\s*url\(["\']?([^"\'()]+)["\']?\)'
-
-        images = []
-
-        # Find img tags
-        for match in re.finditer(img_pattern, html_content, re.IGNORECASE):
-            img_src = match.group(1)
-            images.append(('img', img_src, match.start(), match.end()))
-
-        # Find background images
-        for match in re.finditer(bg_pattern, html_content, re.IGNORECASE):
-            bg_src = match.group(1)
-            images.append(('background', bg_src, match.start(), match.end()))
-
-        return images
+        """Extract all image references from raw HTML bytes"""
+        # Only the captured src is decoded
+        return [(img_type, img_src.decode('utf-8', errors='ignore'), start, end)
+                for img_type, img_src, start, end in _iter_image_refs(html_content)]
 
     def normalize_image_path(self, img_src):
         """Normalize image path to just the filename"""
@@ -90,28 +115,60 @@ class ImageCaseChecker:
 
     def check_file(self, html_file):
         """Check a single HTML file for image case issues"""
+        issues, images_checked, _ = self._find_issues(html_file)
+        self._record(issues, images_checked)
+        return issues
+
+    def _record(self, issues, images_checked):
+        """Add one file's results to the running totals"""
+        self.images_checked += images_checked
+        for issue in issues:
+            if 'correct_name' in issue:
+                self.case_mismatches.append(issue)
+            else:
+                self.missing_images.append(issue)
+
+    def _find_issues(self, html_file):
+        """Return (issues, images_checked, content) for a single HTML file
+
+        content is the raw file bytes when there is a case mismatch to fix,
+        so fix_file can reuse them instead of reading the file again, and
+        None otherwise. Only reads self.actual_images, so it is safe to run
+        from worker threads; the caller records the results.
+        """
         try:
-            with open(html_file, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
+            with open(html_file, 'rb', buffering=IO_BUFFER_SIZE) as f:
+                raw = f.read()
         except Exception as e:
             print(f"Error reading {html_file}: {e}")
-            return []
+            return [], 0, None
+
+        # Cheap byte-level check before decoding and running the regex;
+        # most pages have no images at all
+        raw_lower = raw.lower()
+        if b'<img' not in raw_lower and b'background' not in raw_lower:
+            return [], 0, None
 
         issues = []
-        images = self.extract_image_references(content)
+        images = self.extract_image_references(raw)
+
+        # Bind the hot lookups to locals once for the per-image loop
+        actual_images = self.actual_images
+        normalize_image_path = self.normalize_image_path
 
         for img_type, img_src, start_pos, end_pos in images:
-            self.images_checked += 1
-            filename = self.normalize_image_path(img_src)
+            filename = normalize_image_path(img_src)
 
-            # Skip non-jpg images or external URLs
-            if not filename or filename.startswith('http') or not filename.lower().endswith(('.jpg', '.jpeg')):
+            # Skip external URLs, then non-jpg images
+            if not filename or filename.startswith('http'):
                 continue
 
             filename_lower = filename.lower()
+            if not filename_lower.endswith(('.jpg', '.jpeg')):
+                continue
 
-            if filename_lower in self.actual_images:
-                actual_filename = self.actual_images[filename_lower]
+            actual_filename = actual_images.get(filename_lower)
+            if actual_filename is not None:
                 if filename != actual_filename:
                     # Case mismatch found
                     issue = {
@@ -124,7 +181,6 @@ class ImageCaseChecker:
                         'end_pos': end_pos
                     }
                     issues.append(issue)
-                    self.case_mismatches.append(issue)
             else:
                 # Image file not found
                 issue = {
@@ -136,40 +192,64 @@ class ImageCaseChecker:
                     'end_pos': end_pos
                 }
                 issues.append(issue)
-                self.missing_images.append(issue)
 
-        return issues
+        # Only hold on to the bytes of files that will actually be fixed
+        has_mismatch = any('correct_name' in issue for issue in issues)
+        return issues, len(images), raw if has_mismatch else None
 
-    def fix_file(self, html_file, issues):
-        """Fix case sensitivity issues in a single file"""
-        try:
-            with open(html_file, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-        except Exception as e:
-            print(f"Error reading {html_file}: {e}")
-            return False
+    def fix_file(self, html_file, content=None):
+        """Fix case sensitivity issues in a single file
 
-        # Sort issues by position (reverse order to maintain positions)
-        issues_to_fix = [issue for issue in issues if 'correct_name' in issue]
-        issues_to_fix.sort(key=lambda x: x['start_pos'], reverse=True)
+        Finds every image reference whose filename differs only in case
+        from an indexed image, looking the correct name up directly in
+        self.actual_images, then rewrites every occurrence of those srcs in
+        a single regex pass. Pass the already-read bytes as content to skip
+        reading the file again.
+        """
+        if content is None:
+            try:
+                with open(html_file, 'rb', buffering=IO_BUFFER_SIZE) as f:
+                    content = f.read()
+            except Exception as e:
+                print(f"Error reading {html_file}: {e}")
+                return False
 
+        actual_images = self.actual_images
+        normalize_image_path = self.normalize_image_path
         changes_made = 0
 
-        for issue in issues_to_fix:
-            old_src = issue['full_src']
-            # Replace the filename part with correct case
-            if '/jpg/' in old_src:
-                new_src = old_src.replace(issue['wrong_name'], issue['correct_name'])
-            else:
-                new_src = old_src.replace(issue['wrong_name'], issue['correct_name'])
+        # Map each wrong src to its corrected form; duplicates of the same
+        # src collapse into one entry but still count as separate fixes
+        replacements = {}
+        for img_type, img_src, start_pos, end_pos in _iter_image_refs(content):
+            filename = normalize_image_path(img_src.decode('utf-8', errors='ignore'))
 
-            # Replace in content
-            content = content.replace(old_src, new_src)
+            # Same filtering as the check: only local jpg references
+            if not filename or filename.startswith('http'):
+                continue
+            filename_lower = filename.lower()
+            if not filename_lower.endswith(('.jpg', '.jpeg')):
+                continue
+
+            actual_filename = actual_images.get(filename_lower)
+            if actual_filename is None or actual_filename == filename:
+                continue
+
+            # Replace the filename part of the src with correct case
+            replacements[img_src] = img_src.replace(filename.encode('utf-8'), actual_filename.encode('utf-8'))
             changes_made += 1
 
+        # Rewrite every occurrence of every wrong src, not only the matched
+        # references, so <a href> links to the full-size image are fixed too.
+        # Longest first so a src is never shadowed by a shorter one it starts with.
+        if replacements:
+            pattern = re.compile(b'|'.join(
+                re.escape(src) for src in sorted(replacements, key=len, reverse=True)))
+            content = pattern.sub(lambda m: replacements[m.group(0)], content)
+
         if changes_made > 0:
             try:
-                with open(html_file, 'w', encoding='utf-8') as f:
+                with open(html_file, 'wb', buffering=IO_BUFFER_SIZE) as f:
                     f.write(content)
                 print(f"Fixed {changes_made} image references in {html_file}")
                 return True
@@ -189,24 +269,26 @@ class ImageCaseChecker:
         print(f"Mode: {'FIX' if fix_issues and not dry_run else 'DRY-RUN' if dry_run else 'CHECK'}")
         print("-" * 50)
 
-        for root, dirs, files in os.walk(self.htm_path):
-            for file in files:
-                if file.lower().endswith(('.html', '.htm')):
-                    html_file = Path(root) / file
-                    self.files_checked += 1
-
-                    issues = self.check_file(html_file)
-
-                    if issues:
-                        print(f"\nIssues in {html_file}:")
-                        for issue in issues:
-                            if 'correct_name' in issue:
-                                print(f"  Case mismatch: {issue['wrong_name']} → {issue['correct_name']}")
-                            else:
-                                print(f"  Missing image: {issue['missing_name']}")
-
-                        if fix_issues and not dry_run:
-                            self.fix_file(html_file, issues)
+        html_files = list(iter_html_files(str(self.htm_path), ignore_case=True))
+
+        # Reads dominate, so overlap them across threads; results come back
+        # in walk order and are recorded and printed from this thread only
+        with ThreadPoolExecutor(max_workers=(os.cpu_count() or 1) * 2) as executor:
+            results = executor.map(self._find_issues, html_files)
+            for html_file, (issues, images_checked, content) in zip(html_files, results):
+                self.files_checked += 1
+                self._record(issues, images_checked)
+
+                if issues:
+                    print(f"\nIssues in {html_file}:")
+                    for issue in issues:
+                        if 'correct_name' in issue:
+                            print(f"  Case mismatch: {issue['wrong_name']} → {issue['correct_name']}")
+                        else:
+                            print(f"  Missing image: {issue['missing_name']}")
+
+                    if fix_issues and not dry_run and content is not None:
+                        self.fix_file(html_file, content)
 
     def print_summary(self):
         """Print summary of findings"""
@@ -4,43 +4,174 @@ Final cleanup script for remaining /AuntRuth/ references
 Handles .HTM files (uppercase) and CSS references that were missed in previous runs
 """
 
+import mmap
 import os
-import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-def process_file(filepath):
-    """Process a single file to fix /AuntRuth/ references"""
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from _fswalk import iter_html_files
+
+# 128 KB buffers for reading and writing HTML files
+IO_BUFFER_SIZE = 128 * 1024
+
+AUNTRUTH_MARKER = '/AuntRuth/'
+
+# A marker whose leading '/' was the last character of the previous fix
+CHAINED_MARKER = AUNTRUTH_MARKER[1:]
+
+# What may follow the marker, and the root-relative path it becomes
+AUNTRUTH_SUFFIXES = (
+    ('htm/', '/htm/'),
+    ('css/', '/css/'),
+    ('jpg/', '/jpg/'),
+    ('mpg/', '/mpg/'),
+    ('au/', '/au/'),
+    ('index.htm', '/index.htm'),
+)
+
+def find_href_start(content, pos, lower_bound):
+    """Return the start of an href= attribute whose quote ends at pos, or -1
+
+    Steps backwards over the attribute from the quote just before pos,
+    so any amount of spacing around the '=' is handled without searching
+    forwards through the text before it. Nothing before lower_bound is
+    considered.
+    """
+    i = pos - 1
+    if i < lower_bound or content[i] not in '"\'':
+        return -1
+    while i > lower_bound and content[i - 1].isspace():
+        i -= 1
+    if i <= lower_bound or content[i - 1] != '=':
+        return -1
+    i -= 1
+    while i > lower_bound and content[i - 1].isspace():
+        i -= 1
+    if i - 4 >= lower_bound and content.startswith('href', i - 4):
+        return i - 4
+    return -1
+
+def fix_auntruth(content):
+    """Rewrite every /AuntRuth/ reference in content to its root-relative form
+
+    Every fix starts with the same literal marker, so rather than running
+    a regex over the whole file this jumps between occurrences with
+    str.find and only inspects the few characters around each one: asset
+    directory paths, /AuntRuth/index.htm, and home page hrefs of the form
+    href="/AuntRuth/" (normalized to href="/"). The pieces are joined once
+    at the end.
+
+    The output matches applying one re.sub per fix in AUNTRUTH_SUFFIXES
+    order, as this script originally did. Those passes also rewrote a
+    marker whose leading '/' is the trailing '/' of a replaced path, so
+    /AuntRuth/htm/AuntRuth/css/ becomes /htm/css/. The exception is a
+    marker with the same suffix as the one before it: that pass had already
+    consumed the shared '/', so /AuntRuth/htm/AuntRuth/htm/ becomes
+    /htm/AuntRuth/htm/.
+    """
+    parts = []
+    copied = 0
+    pos = content.find(AUNTRUTH_MARKER)
+    while pos != -1:
+        after = pos + len(AUNTRUTH_MARKER)
+
+        for suffix, replacement in AUNTRUTH_SUFFIXES:
+            if content.startswith(suffix, after):
+                parts.append(content[copied:pos])
+                parts.append(replacement)
+                copied = after + len(suffix)
+                break
+        else:
+            suffix = None
+            href_start = find_href_start(content, pos, copied)
+            if href_start != -1 and content.startswith(content[pos - 1], after):
+                quote = content[pos - 1]
+                parts.append(content[copied:href_start])
+                parts.append(f'href={quote}/{quote}')
+                copied = after + 1
+            else:
+                # Some other /AuntRuth/ path - left for manual review. Resume
+                # one character on, as markers can overlap (/AuntRuth/AuntRuth/)
+                pos = content.find(AUNTRUTH_MARKER, pos + 1)
+                continue
+
+        # Follow a chain of markers sharing the '/' that ends each replaced path
+        while suffix is not None and suffix.endswith('/') and content.startswith(CHAINED_MARKER, copied):
+            chained_after = copied + len(CHAINED_MARKER)
+            for chained_suffix, replacement in AUNTRUTH_SUFFIXES:
+                if content.startswith(chained_suffix, chained_after):
+                    break
+            else:
+                break
+            if chained_suffix == suffix:
+                break
+            # The shared '/' is already in the output
+            parts.append(replacement[1:])
+            copied = chained_after + len(chained_suffix)
+            suffix = chained_suffix
+
+        pos = content.find(AUNTRUTH_MARKER, copied)
+
+    if not parts:
+        return content
+    parts.append(content[copied:])
+    return ''.join(parts)
+
+def read_and_process(filepath):
+    """Read one file and fix it if it still contains /AuntRuth/
+
+    Returns (found, changed, remaining) where remaining says whether the
+    rewritten content still has /AuntRuth/. The content read here is
+    handed straight to process_file, so each file is read only once.
+    """
     try:
-        with open(filepath, 'r', encoding='utf-8', errors='ignore') as file:
+        # Look for the marker through a read-only mapping so files without
+        # it (the vast majority) are never copied into a Python string
+        with open(filepath, 'rb', buffering=0) as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return False, False, False
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if mm.find(b'/AuntRuth/') == -1:
+                    return False, False, False
+
+        with open(filepath, 'r', encoding='utf-8', errors='ignore', buffering=IO_BUFFER_SIZE) as file:
             content = file.read()
+    except Exception as e:
+        print(f"Error reading {filepath}: {e}")
+        return False, False, False
+    if '/AuntRuth/' not in content:
+        return False, False, False
+    changed, remaining = process_file(filepath, content)
+    return True, changed, remaining
+
+def process_file(filepath, content):
+    """Fix /AuntRuth/ references in already-read file content
+
+    Returns (changed, remaining) where remaining says whether /AuntRuth/
+    is still present in what ends up on disk - this replaces a separate
+    verification pass over the tree.
+    """
+    try:
+        # Nothing to fix - skip the regex pass entirely
+        if '/AuntRuth/' not in content:
+            return False, False
 
-        original_content = content
-
-        # Apply all /AuntRuth/ path fixes
-        content = re.sub(r'/AuntRuth/htm/', '/htm/', content)
-        content = re.sub(r'/AuntRuth/css/', '/css/', content)
-        content = re.sub(r'/AuntRuth/jpg/', '/jpg/', content)
-        content = re.sub(r'/AuntRuth/mpg/', '/mpg/', content)
-        content = re.sub(r'/AuntRuth/au/', '/au/', content)
-
-        # Fix home page references with various spacing patterns
-        content = re.sub(r'href\s*=\s*"/AuntRuth/"', 'href="/"', content)
-        content = re.sub(r"href\s*=\s*'/AuntRuth/'", "href='/'", content)
-
-        # Fix /AuntRuth/index.htm references
-        content = re.sub(r'/AuntRuth/index\.htm', '/index.htm', content)
+        # Apply all /AuntRuth/ path, home page and index.htm fixes in one pass
+        new_content = fix_auntruth(content)
+        remaining = '/AuntRuth/' in new_content
 
         # Write back if changed
-        if content != original_content:
-            with open(filepath, 'w', encoding='utf-8') as file:
-                file.write(content)
-            return True
-        return False
+        if new_content != content:
+            with open(filepath, 'w', encoding='utf-8', buffering=IO_BUFFER_SIZE) as file:
+                file.write(new_content)
+            return True, remaining
+        return False, remaining
 
     except Exception as e:
         print(f"Error processing {filepath}: {e}")
-        return False
+        return False, True
 
 def main():
     """Main processing function"""
@@ -50,55 +181,39 @@ def main():
         print(f"Directory {base_dir} does not exist")
         sys.exit(1)
 
-    # Find all files with remaining /AuntRuth/ references
-    print("Finding files with remaining /AuntRuth/ references...")
+    # Find and fix files with remaining /AuntRuth/ references in one pass
+    print("Finding and processing files with remaining /AuntRuth/ references...")
+
+    found_count = 0
+    processed_count = 0
+    remaining_files = []
 
-    files_to_process = []
+    # Get all .HTM and .htm files, then read and fix them across threads so
+    # disk reads overlap with the regex work; results come back in walk order
+    filepaths = list(iter_html_files(str(base_dir), ignore_case=True, suffixes=('.htm', '.css')))
+    with ThreadPoolExecutor(max_workers=(os.cpu_count() or 1) * 2) as executor:
+        for filepath, (found, changed, remaining) in zip(filepaths, executor.map(read_and_process, filepaths)):
+            if not found:
+                continue
+            found_count += 1
+            if changed:
+                processed_count += 1
+                print(f"Processed: {filepath}")
 
-    # Get all .HTM and .htm files that contain /AuntRuth/
-    for filepath in base_dir.rglob('*'):
-        if filepath.is_file() and filepath.suffix.lower() in ['.htm', '.css']:
-            try:
-                with open(filepath, 'r', encoding='utf-8', errors='ignore') as file:
-                    content = file.read()
-                    if '/AuntRuth/' in content:
-                        files_to_process.append(filepath)
-            except Exception as e:
-                print(f"Error reading {filepath}: {e}")
+            if remaining:
+                remaining_files.append(filepath)
 
-    print(f"Found {len(files_to_process)} files to process")
+    print(f"Found {found_count} files to process")
 
-    if not files_to_process:
+    if not found_count:
         print("No files found with /AuntRuth/ references")
         return
 
-    # Process files
-    processed_count = 0
-
-    for filepath in files_to_process:
-        if process_file(filepath):
-            processed_count += 1
-            print(f"Processed: {filepath}")
-
     print(f"\nCompleted processing {processed_count} files")
-
-    # Final verification
-    print("\nFinal verification...")
-    remaining_files = []
-    for filepath in base_dir.rglob('*'):
-        if filepath.is_file() and filepath.suffix.lower() in ['.htm', '.css']:
-            try:
-                with open(filepath, 'r', encoding='utf-8', errors='ignore') as file:
-                    content = file.read()
-                    if '/AuntRuth/' in content:
-                        remaining_files.append(filepath)
-            except Exception:
-                pass
-
     print(f"Files still containing /AuntRuth/ after processing: {len(remaining_files)}")
     if remaining_files and len(remaining_files) <= 10:
         for f in remaining_files:
             print(f"  {f}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -13,17 +13,73 @@ Required transformations:
 import os
 import re
 import sys
-from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from _gitutil import get_current_branch
+
+# 128 KB buffers for reading and writing HTML files
+IO_BUFFER_SIZE = 128 * 1024
 
 def verify_git_branch(expected_branch):
     """Verify we're working in the correct branch"""
-    import subprocess
-    result = subprocess.run(["git", "branch", "--show-current"], capture_output=True, text=True)
-    current_branch = result.stdout.strip()
+    current_branch = get_current_branch()
     if current_branch != expected_branch:
         raise ValueError(f"Expected branch {expected_branch}, but currently on {current_branch}")
     return current_branch
 
+# Java applet pattern - matches the exact format found in files
+JAVA_APPLET_PATTERN = re.compile(
+    rb'<APPLET CODE\s*=\s*[\'"]hcslsond\.class[\'"][^>]*>'
+    rb'<PARAM NAME\s*=\s*[\'"]sondfile[\'"] VALUE\s*=\s*[\'"]([^\'\"]+\.au)[\'"]>'
+    rb'</APPLET>',
+    re.IGNORECASE
+)
+
+def replace_applet(match):
+    """Build the HTML5 audio element for a matched Java applet"""
+    audio_file = match.group(1).decode('utf-8', 'replace')
+    html5_audio = (
+        f'<audio controls preload="none">\n'
+        f'  <source src="{audio_file}" type="audio/basic">\n'
+        f'  Your browser does not support the audio element.\n'
+        f'</audio>'
+    )
+    return html5_audio.encode('utf-8')
+
+def modernize_applets_in_file(file_path, dry_run=False):
+    """Replace Java applets in a single file
+
+    Pure per-file worker returning (file_path, audio_files, error) so the
+    caller decides how to report results.
+    """
+    try:
+        # Read file as bytes - the applet markup is ASCII, so skip decoding
+        with open(file_path, 'rb', buffering=IO_BUFFER_SIZE) as f:
+            content = f.read()
+
+        # Cheap substring check before running the applet regex
+        if b'<APPLET' not in content.upper():
+            return file_path, [], None
+
+        # Replace and record the converted audio files in a single pass
+        audio_files = []
+
+        def replace_and_record(match):
+            audio_files.append(match.group(1).decode('utf-8', 'replace'))
+            return replace_applet(match)
+
+        new_content, replaced = JAVA_APPLET_PATTERN.subn(replace_and_record, content)
+
+        # Write file back only if something was actually replaced
+        if replaced and not dry_run:
+            with open(file_path, 'wb', buffering=IO_BUFFER_SIZE) as f:
+                f.write(new_content)
+
+        return file_path, audio_files, None
+
+    except Exception as e:
+        return file_path, [], str(e)
+
 def modernize_java_applets(target_dir="docs/htm", dry_run=False):
     """Replace Java applet sound players with HTML5 audio elements"""
 
@@ -43,14 +99,6 @@ def modernize_java_applets(target_dir="docs/htm", dry_run=False):
         "docs/htm/L9/index.htm"
     ]
 
-    # Java applet pattern - matches the exact format found in files
-    java_applet_pattern = re.compile(
-        r'<APPLET CODE\s*=\s*[\'"]hcslsond\.class[\'"][^>]*>'
-        r'<PARAM NAME\s*=\s*[\'"]sondfile[\'"] VALUE\s*=\s*[\'"]([^\'\"]+\.au)[\'"]>'
-        r'</APPLET>',
-        re.IGNORECASE
-    )
-
     processed_files = 0
     total_replacements = 0
 
@@ -64,44 +112,19 @@ def modernize_java_applets(target_dir="docs/htm", dry_run=False):
             print(f"Warning: File not found: {file_path}")
             continue
 
-        try:
-            # Read file
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-
-            # Find and replace Java applets
-            def replace_applet(match):
-                audio_file = match.group(1)
-                html5_audio = (
-                    f'<audio controls preload="none">\n'
-                    f'  <source src="{audio_file}" type="audio/basic">\n'
-                    f'  Your browser does not support the audio element.\n'
-                    f'</audio>'
-                )
-                return html5_audio
-
-            # Count matches first
-            matches = java_applet_pattern.findall(content)
-            if matches:
-                print(f"  {file_path}: Found {len(matches)} Java applet(s)")
-                for audio_file in matches:
-                    print(f"    - Converting /au/{audio_file.split('/')[-1]} to HTML5 audio")
-
-                if not dry_run:
-                    # Perform replacement
-                    new_content = java_applet_pattern.sub(replace_applet, content)
-
-                    # Write file back
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        f.write(new_content)
-
-                total_replacements += len(matches)
-                processed_files += 1
-            else:
-                print(f"  {file_path}: No Java applets found")
-
-        except Exception as e:
-            print(f"Error processing {file_path}: {e}")
+        _, audio_files, error = modernize_applets_in_file(file_path, dry_run)
+
+        if error:
+            print(f"Error processing {file_path}: {error}")
+        elif audio_files:
+            print(f"  {file_path}: Found {len(audio_files)} Java applet(s)")
+            for audio_file in audio_files:
+                print(f"    - Converting /au/{audio_file.split('/')[-1]} to HTML5 audio")
+
+            total_replacements += len(audio_files)
+            processed_files += 1
+        else:
+            print(f"  {file_path}: No Java applets found")
 
     print(f"\nSummary:")
     print(f"  Files processed: {processed_files}")
@@ -10,154 +10,196 @@ Date: 2025-09-22
 Task: 011-add-doctype
 """
 
+import mmap
 import os
 import re
+import shutil
 import sys
 import subprocess
 import argparse
 from datetime import datetime
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from _fswalk import iter_html_files
+from _gitutil import get_current_branch
+
+# Standard HTML5 DOCTYPE
+DOCTYPE = b'<!DOCTYPE html>\n'
+
+# Bytes read at a time from the start of a file to find its first tag
+HEAD_SIZE = 1024
+
+# An existing DOCTYPE anywhere in the file, in any case
+DOCTYPE_RE = re.compile(rb'<!doctype', re.IGNORECASE)
+
+# 128 KB buffers for reading and writing HTML files
+IO_BUFFER_SIZE = 128 * 1024
+
+# Files between progress lines; progress goes to stderr so it stays out of piped logs
+PROGRESS_INTERVAL = 5000
 
 def verify_git_branch(expected_branch):
     """Verify we're working in the correct branch"""
     try:
-        result = subprocess.run(["git", "branch", "--show-current"], capture_output=True, text=True)
-        current_branch = result.stdout.strip()
+        current_branch = get_current_branch()
         if current_branch != expected_branch:
             raise ValueError(f"Expected branch {expected_branch}, but currently on {current_branch}")
         return current_branch
     except Exception as e:
         raise ValueError(f"Failed to verify git branch: {e}")
 
-def find_html_files(target_dir):
-    """Find all HTML files recursively"""
-    html_files = []
-
-    for root, dirs, files in os.walk(target_dir):
-        for file in files:
-            if file.endswith(('.htm', '.html')):
-                file_path = os.path.join(root, file)
-                html_files.append(file_path)
-
-    return sorted(html_files)
+def stage_files(file_paths, batch_size=500):
+    """Stage only the given files, instead of rescanning the whole tree with 'git add .'"""
+    for start in range(0, len(file_paths), batch_size):
+        subprocess.run(["git", "add", "--"] + file_paths[start:start + batch_size], check=True)
 
 def needs_doctype(file_path):
-    """Check if file needs DOCTYPE declaration"""
-    try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
-
-        # Check if file already has DOCTYPE
-        if '<!DOCTYPE' in content.upper():
-            return False, content
-
-        # Check if file starts with <html> (needs DOCTYPE)
-        content_stripped = content.strip()
-        if content_stripped.upper().startswith('<HTML'):
-            return True, content
+    """Check if file needs DOCTYPE declaration
 
-        return False, content
+    A file needs one when its first non-whitespace text is the <html> tag
+    and it has no DOCTYPE anywhere. Only the head of the file is read to
+    find the first tag; the DOCTYPE search runs over a read-only mapping,
+    so no file is copied into memory here.
+    """
+    try:
+        # Work on raw bytes - the markers are ASCII, so no decode is needed
+        with open(file_path, 'rb') as f:
+            head = f.read(HEAD_SIZE).lstrip()
+            # Leading whitespace can run past the first block
+            while len(head) < len(b'<html'):
+                block = f.read(HEAD_SIZE)
+                if not block:
+                    break
+                head = (head + block).lstrip()
+
+            # Check if file starts with <html> (needs DOCTYPE)
+            if head[:len(b'<html')].lower() != b'<html':
+                return False
+
+            # Check if file already has DOCTYPE, even a misplaced one
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return DOCTYPE_RE.search(mm) is None
 
     except Exception as e:
         print(f"Error reading {file_path}: {e}")
-        return False, None
-
-def add_doctype_declaration(content):
-    """Add DOCTYPE declaration to HTML content"""
-    # Standard HTML5 DOCTYPE
-    doctype = '<!DOCTYPE html>\n'
-
-    # Find the <html> tag and add DOCTYPE before it
-    # Handle various cases: <html>, <HTML>, with attributes, etc.
-    html_pattern = r'(<html[^>]*>)'
-
-    # Check if content starts with HTML tag
-    content_stripped = content.strip()
-    if re.match(r'<html', content_stripped, re.IGNORECASE):
-        # Add DOCTYPE at the beginning
-        new_content = doctype + content
-        return new_content
-    else:
-        # Look for HTML tag in the content
-        match = re.search(html_pattern, content, re.IGNORECASE)
-        if match:
-            # Insert DOCTYPE before the HTML tag
-            pos = match.start()
-            new_content = content[:pos] + doctype + content[pos:]
-            return new_content
-
-    # If no HTML tag found, add DOCTYPE at the beginning anyway
-    return doctype + content
-
-def process_files_batch(html_files, dry_run=True, test_mode=False, commit_interval=500):
-    """Process files with safety measures"""
+        return False
 
-    if test_mode:
-        print("TEST MODE - Processing only first 5 files")
-        html_files = html_files[:5]
+def write_with_doctype(file_path, content):
+    """Write the DOCTYPE declaration followed by the original content
 
-    # Filter files that need DOCTYPE
-    files_to_process = []
+    needs_doctype() only accepts files whose first non-whitespace text is
+    the <html> tag, so the DOCTYPE can simply be prepended. Writing it and
+    the body separately through one buffered writer avoids building a
+    concatenated copy of the whole file.
+    """
+    with open(file_path, 'wb', buffering=IO_BUFFER_SIZE) as f:
+        f.write(DOCTYPE)
+        f.write(content)
 
-    print("Analyzing files for DOCTYPE requirements...")
-    for i, file_path in enumerate(html_files):
-        if i % 1000 == 0:
-            print(f"Analyzed {i}/{len(html_files)} files...")
+def _check_doctype_worker(file_path):
+    """Worker: report whether a file needs a DOCTYPE without shipping its content back"""
+    return file_path, needs_doctype(file_path)
 
-        needs_change, content = needs_doctype(file_path)
-        if needs_change and content is not None:
-            files_to_process.append((file_path, content))
+def _add_doctype_worker(file_path):
+    """Worker: add a DOCTYPE to a single file if it needs one
 
-    print(f"\nFound {len(files_to_process)} files that need DOCTYPE declarations")
+    Returns (file_path, changed, error). Content never leaves the worker,
+    so only one file is held in memory at a time.
+    """
+    if not needs_doctype(file_path):
+        return file_path, False, None
 
-    if dry_run:
-        print("\nDRY RUN - Files that would be changed:")
-        for i, (file_path, _) in enumerate(files_to_process):
-            if i < 10:  # Show first 10
-                print(f"  {file_path}")
-            elif i == 10:
-                print(f"  ... and {len(files_to_process) - 10} more files")
-                break
-        return files_to_process
+    try:
+        with open(file_path, 'rb', buffering=IO_BUFFER_SIZE) as f:
+            original_content = f.read()
+    except Exception as e:
+        return file_path, False, str(e)
 
-    if not files_to_process:
-        print("No files need DOCTYPE declarations")
-        return files_to_process
+    # Write the DOCTYPE + content to a temp file and swap it into place,
+    # so an interrupted run never leaves a half-written HTML file. The temp
+    # file takes the original's mode, and is removed again if anything fails
+    temp_path = file_path + '.tmp'
+    try:
+        write_with_doctype(temp_path, original_content)
+        shutil.copymode(file_path, temp_path)
+        os.replace(temp_path, file_path)
+    except Exception as e:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        return file_path, False, str(e)
 
-    # Process files
-    processed = 0
-    errors = []
+    return file_path, True, None
 
-    for i, (file_path, original_content) in enumerate(files_to_process):
-        try:
-            # Add DOCTYPE declaration
-            new_content = add_doctype_declaration(original_content)
+def process_files_batch(html_files, dry_run=True, test_mode=False, commit_interval=500, checkpoint=False):
+    """Process files with safety measures"""
 
-            # Write the modified content
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(new_content)
+    if test_mode:
+        print("TEST MODE - Processing only first 5 files")
+        html_files = html_files[:5]
 
+    # Files are independent, so analysis and rewriting are spread across all CPUs
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        if dry_run:
+            print("Analyzing files for DOCTYPE requirements...")
+            files_to_process = []
+            for i, (file_path, needs_change) in enumerate(
+                    executor.map(_check_doctype_worker, html_files, chunksize=64)):
+                if i and i % PROGRESS_INTERVAL == 0:
+                    print(f"Analyzed {i}/{len(html_files)} files...", file=sys.stderr)
+                if needs_change:
+                    files_to_process.append(file_path)
+
+            print(f"\nFound {len(files_to_process)} files that need DOCTYPE declarations")
+
+            print("\nDRY RUN - Files that would be changed:")
+            for i, file_path in enumerate(files_to_process):
+                if i < 10:  # Show first 10
+                    print(f"  {file_path}")
+                elif i == 10:
+                    print(f"  ... and {len(files_to_process) - 10} more files")
+                    break
+            return files_to_process
+
+        # Analyze and rewrite each file in a single pass
+        print("Adding DOCTYPE declarations where required...")
+        files_to_process = []
+        processed = 0
+        errors = []
+
+        for i, (file_path, changed, error) in enumerate(
+                executor.map(_add_doctype_worker, html_files, chunksize=64)):
+            if i and i % PROGRESS_INTERVAL == 0:
+                print(f"Analyzed {i}/{len(html_files)} files, changed {processed}...", file=sys.stderr)
+
+            if error:
+                error_msg = f"Error processing {file_path}: {error}"
+                print(error_msg)
+                errors.append(error_msg)
+                continue
+
+            if not changed:
+                continue
+
+            files_to_process.append(file_path)
             processed += 1
 
-            # Progress reporting
-            if processed % 100 == 0:
-                print(f"Processed {processed}/{len(files_to_process)} files...")
-
-            # Commit at intervals for large batches
-            if not test_mode and processed % commit_interval == 0:
+            # Optionally commit at intervals for large batches
+            if checkpoint and not test_mode and processed % commit_interval == 0:
                 try:
-                    subprocess.run(["git", "add", "."], check=True)
-                    commit_msg = f"Task 011: Add DOCTYPE declarations - checkpoint {processed}/{len(files_to_process)} files"
+                    stage_files(files_to_process[-commit_interval:])
+                    commit_msg = f"Task 011: Add DOCTYPE declarations - checkpoint {processed} files"
                     subprocess.run(["git", "commit", "-m", commit_msg], check=True)
                     print(f"Checkpoint commit at {processed} files")
                 except subprocess.CalledProcessError as e:
                     print(f"Warning: Checkpoint commit failed: {e}")
 
-        except Exception as e:
-            error_msg = f"Error processing {file_path}: {e}"
-            print(error_msg)
-            errors.append(error_msg)
-            continue
+    if not files_to_process and not errors:
+        print("No files need DOCTYPE declarations")
+        return files_to_process
 
     print(f"\nCompleted processing:")
     print(f"- Successfully processed: {processed} files")
@@ -172,27 +214,39 @@ def process_files_batch(html_files, dry_run=True, test_mode=False, commit_interv
 
     return files_to_process
 
-def validate_changes(sample_files, original_contents):
-    """Validate that changes were applied correctly"""
+def collect_validation_samples(html_files, sample_size=5):
+    """Keep the original content of the first few files that need a DOCTYPE
+
+    Only this small sample is held in memory for later validation.
+    """
+    samples = {}
+    for file_path in html_files:
+        if needs_doctype(file_path):
+            samples[file_path] = Path(file_path).read_bytes()
+            if len(samples) >= sample_size:
+                break
+    return samples
+
+def validate_changes(original_contents):
+    """Validate that changes were applied correctly
+
+    original_contents maps file paths to their content before processing.
+    """
     print("\nValidating sample of changed files...")
 
     validation_errors = []
-    sample_size = min(5, len(sample_files))
+    sample_size = len(original_contents)
 
-    for i in range(sample_size):
-        file_path, original_content = sample_files[i], original_contents[i]
+    for file_path, original_content in original_contents.items():
 
         try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                new_content = f.read()
+            new_content = Path(file_path).read_bytes()
 
-            # Check if DOCTYPE was added
-            if '<!DOCTYPE html>' not in new_content:
+            # The change is a pure prepend, so the file must start with the
+            # DOCTYPE and be followed by the original bytes unchanged
+            if not new_content.startswith(DOCTYPE):
                 validation_errors.append(f"DOCTYPE not found in {file_path}")
-
-            # Check if original content is preserved (minus DOCTYPE)
-            content_without_doctype = new_content.replace('<!DOCTYPE html>\n', '')
-            if content_without_doctype.strip() != original_content.strip():
+            elif new_content[len(DOCTYPE):] != original_content:
                 validation_errors.append(f"Content changed unexpectedly in {file_path}")
 
         except Exception as e:
@@ -223,6 +277,8 @@ def main():
                        help='Expected git branch name')
     parser.add_argument('--yes', action='store_true',
                        help='Skip confirmation prompt for batch processing')
+    parser.add_argument('--checkpoint', action='store_true',
+                       help='Also commit every 500 changed files instead of only once at the end')
 
     args = parser.parse_args()
 
@@ -252,7 +308,7 @@ def main():
 
     # Find all HTML files
     print("\nScanning for HTML files...")
-    html_files = find_html_files(args.target_dir)
+    html_files = sorted(iter_html_files(args.target_dir))
     print(f"Found {len(html_files)} HTML files")
 
     if not html_files:
@@ -267,15 +323,13 @@ def main():
         print("RUNNING IN TEST MODE (5 files only)")
         print("="*40)
 
-        original_contents = []
-        for file_path in html_files[:5]:
-            _, content = needs_doctype(file_path)
-            original_contents.append(content)
+        if args.validate:
+            original_contents = collect_validation_samples(html_files[:5])
 
         files_processed = process_files_batch(html_files, dry_run=False, test_mode=True)
 
         if args.validate and files_processed:
-            validate_changes([(f[0], f[1]) for f in files_processed], original_contents)
+            validate_changes(original_contents)
 
     elif args.execute:
         print("\n" + "="*40)
@@ -294,12 +348,16 @@ def main():
         else:
             print(f"Auto-confirmed: Processing {len(html_files)} files...")
 
-        files_processed = process_files_batch(html_files, dry_run=False, test_mode=False)
+        if args.validate:
+            original_contents = collect_validation_samples(html_files)
+
+        files_processed = process_files_batch(html_files, dry_run=False, test_mode=False,
+                                              checkpoint=args.checkpoint)
 
         # Final commit
         if files_processed:
             try:
-                subprocess.run(["git", "add", "."], check=True)
+                stage_files(files_processed)
                 commit_msg = f"Task 011: Add DOCTYPE declarations - completed {len(files_processed)} files"
                 subprocess.run(["git", "commit", "-m", commit_msg], check=True)
                 print("Final commit completed")
@@ -308,9 +366,7 @@ def main():
 
         if args.validate and files_processed:
             # Sample validation on a few files
-            sample_files = files_processed[:5]
-            original_contents = [f[1] for f in sample_files]
-            validate_changes([(f[0], f[1]) for f in sample_files], original_contents)
+            validate_changes(original_contents)
 
     else:
         print("\nNo action specified. Use --dry-run, --test-mode, or --execute")
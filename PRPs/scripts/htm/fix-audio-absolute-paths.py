@@ -5,8 +5,20 @@ Fix audio paths to use absolute paths that work with localhost:8000/auntruth/ se
 
 import os
 import re
+import sys
 from pathlib import Path
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from _rewrite import rewrite_files
+
+# From: src="/au/filename.au" (before fix-audio-paths.py has run)
+# To: src="../../au/filename.au"
+RELATIVE_AUDIO_PATHS = (b'src="/au/', b'src="../../au/')
+
+# From: src="../../au/filename.au"
+# To: src="/auntruth/au/filename.au"
+ABSOLUTE_AUDIO_PATHS = (b'src="../../au/', b'src="/auntruth/au/')
+
 def fix_audio_absolute_paths():
     """Fix audio source paths to use absolute paths for localhost testing"""
 
@@ -20,6 +32,7 @@ def fix_audio_absolute_paths():
         "L8/index.htm", "L9/index.htm", "L3/PRINGCEM.htm", "L4/LATHBOOK.htm"
     ]
 
+    file_paths = []
     for file_rel_path in files_to_fix:
         file_path = target_dir / file_rel_path
 
@@ -27,21 +40,16 @@ def fix_audio_absolute_paths():
             print(f"Skipping {file_path} - does not exist")
             continue
 
-        print(f"Processing {file_path}")
+        file_paths.append(file_path)
 
-        # Read the file
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
-
-        # Fix the audio source path to absolute path for localhost
-        # From: src="../../au/filename.au"
-        # To: src="/auntruth/au/filename.au"
-        new_content = content.replace('src="../../au/', 'src="/auntruth/au/')
-
-        # Write the file back
-        if new_content != content:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(new_content)
+    # Fix the audio source path to absolute path for localhost. Both steps
+    # of the relative-then-absolute workflow are applied in order from one
+    # read of each file, so running fix-audio-paths.py first is not needed.
+    # The files are independent, so they are read and rewritten
+    # concurrently; results come back in list order
+    for file_path, changed in rewrite_files(file_paths, [RELATIVE_AUDIO_PATHS, ABSOLUTE_AUDIO_PATHS]):
+        print(f"Processing {file_path}")
+        if changed:
             print(f"  Fixed audio path to absolute in {file_path}")
         else:
             print(f"  No changes needed in {file_path}")
@@ -6,8 +6,16 @@ This ensures audio works when running locally at localhost:8000/auntruth/
 
 import os
 import re
+import sys
 from pathlib import Path
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from _rewrite import rewrite_files
+
+# From: src="/au/filename.au"
+# To: src="../../au/filename.au"
+RELATIVE_AUDIO_PATHS = (b'src="/au/', b'src="../../au/')
+
 def fix_audio_paths():
     """Fix audio source paths from absolute to relative"""
 
@@ -21,6 +29,9 @@ def fix_audio_paths():
         "L8/index.htm", "L9/index.htm", "L3/PRINGCEM.htm", "L4/LATHBOOK.htm"
     ]
 
+    # Every file gets the same fix (L*/index.htm and L3/PRINGCEM.htm,
+    # L4/LATHBOOK.htm alike)
+    file_paths = []
     for file_rel_path in files_to_fix:
         file_path = target_dir / file_rel_path
 
@@ -28,28 +39,13 @@ def fix_audio_paths():
             print(f"Skipping {file_path} - does not exist")
             continue
 
-        print(f"Processing {file_path}")
-
-        # Read the file
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            content = f.read()
+        file_paths.append(file_path)
 
-        # Fix the audio source path
-        # From: src="/au/filename.au"
-        # To: src="../../au/filename.au" (for files in L*/index.htm)
-        # To: src="../../../au/filename.au" (for files in L*/FILENAME.htm)
-
-        if file_rel_path.endswith('/index.htm'):
-            # Files in L*/index.htm need ../../au/
-            new_content = content.replace('src="/au/', 'src="../../au/')
-        else:
-            # Files like L3/PRINGCEM.htm or L4/LATHBOOK.htm need ../../au/
-            new_content = content.replace('src="/au/', 'src="../../au/')
-
-        # Write the file back
-        if new_content != content:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(new_content)
+    # The files are independent, so they are read and rewritten
+    # concurrently; results come back in list order
+    for file_path, changed in rewrite_files(file_paths, [RELATIVE_AUDIO_PATHS]):
+        print(f"Processing {file_path}")
+        if changed:
             print(f"  Fixed audio path in {file_path}")
         else:
             print(f"  No changes needed in {file_path}")